@@ -0,0 +1,152 @@
+import os
+import time
+import resource
+import threading
+
+# Process-wide registry for the heavy, shareable resources (embedder, Chroma, spaCy).
+# Everything is loaded lazily on first use and then reused by every service.
+
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+CHROMA_PATH = os.environ.get("CHROMA_PATH", "chroma_storage")
+CHROMA_COLLECTION_NAME = "llm_tutor_docs"
+SPACY_MODEL_NAME = os.environ.get("SPACY_MODEL_NAME", "en_core_web_sm")
+# Pipeline used where only sentence boundaries are needed (text cleaning):
+#   "senter"      - SPACY_MODEL_NAME with only its statistical sentence recognizer enabled
+#   "sentencizer" - blank English pipeline + rule-based sentencizer (fastest, punctuation-based)
+#   "full"        - the complete SPACY_MODEL_NAME pipeline (tagger, parser, NER, ...)
+SPACY_SENTENCE_MODE = os.environ.get("SPACY_SENTENCE_MODE", "senter")
+
+_lock = threading.RLock()
+_resources = {}
+_load_report = {}
+
+
+def _current_rss_bytes():
+    """Resident set size of this process (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is reported in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _get_or_load(name, loader):
+    """Return the cached resource `name`, loading it once (thread-safe) if needed."""
+    if name in _resources:
+        return _resources[name]
+
+    with _lock:
+        if name in _resources:
+            return _resources[name]
+
+        rss_before = _current_rss_bytes()
+        started = time.perf_counter()
+        value = loader()
+        elapsed = time.perf_counter() - started
+        rss_after = _current_rss_bytes()
+
+        _resources[name] = value
+        _load_report[name] = {
+            "load_seconds": round(elapsed, 3),
+            "rss_delta_bytes": max(0, rss_after - rss_before),
+            "rss_after_bytes": rss_after,
+        }
+        print(f"[REGISTRY] Loaded {name} in {elapsed:.2f}s (+{(rss_after - rss_before) / 1e6:.1f} MB RSS)")
+        return value
+
+
+def get_embedding_function():
+    """Chroma embedding function backed by the shared SentenceTransformer."""
+    def load():
+        from chromadb.utils import embedding_functions
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL_NAME)
+
+    return _get_or_load(f"embedder:{EMBEDDING_MODEL_NAME}", load)
+
+
+def get_embedder():
+    """The shared SentenceTransformer model (same instance the Chroma embedding function uses)."""
+    # SentenceTransformerEmbeddingFunction keeps the loaded model on `_model`
+    return get_embedding_function()._model
+
+
+def get_chroma_client():
+    def load():
+        from chromadb import PersistentClient
+        return PersistentClient(path=CHROMA_PATH)
+
+    return _get_or_load(f"chroma:{CHROMA_PATH}", load)
+
+
+def get_collection():
+    """The `llm_tutor_docs` collection, wired to the shared embedding function."""
+    # Resolve dependencies first so each one's load time is reported on its own
+    client = get_chroma_client()
+    embedding_function = get_embedding_function()
+
+    def load():
+        return client.get_or_create_collection(
+            CHROMA_COLLECTION_NAME,
+            embedding_function=embedding_function
+        )
+
+    return _get_or_load(f"collection:{CHROMA_COLLECTION_NAME}", load)
+
+
+def get_nlp():
+    """The shared spaCy pipeline."""
+    def load():
+        import spacy
+        return spacy.load(SPACY_MODEL_NAME)
+
+    return _get_or_load(f"spacy:{SPACY_MODEL_NAME}", load)
+
+
+def _load_senter_pipeline():
+    import spacy
+
+    nlp = spacy.load(SPACY_MODEL_NAME, exclude=["parser", "tagger", "ner", "lemmatizer", "attribute_ruler"])
+    if "senter" not in nlp.component_names:
+        # Model without a trained sentence recognizer: fall back to punctuation rules
+        if not nlp.has_pipe("sentencizer"):
+            nlp.add_pipe("sentencizer")
+        return nlp
+
+    nlp.enable_pipe("senter")
+    # senter has its own embedding layer; drop the shared tok2vec if nothing listens to it any more
+    if "tok2vec" in nlp.pipe_names and not nlp.get_pipe("tok2vec").listening_components:
+        nlp.remove_pipe("tok2vec")
+    return nlp
+
+
+def get_sentence_nlp(mode=None):
+    """The shared spaCy pipeline for sentence splitting (see SPACY_SENTENCE_MODE)."""
+    mode = mode or SPACY_SENTENCE_MODE
+    if mode == "full":
+        return get_nlp()
+
+    def load():
+        if mode == "senter":
+            return _load_senter_pipeline()
+        if mode == "sentencizer":
+            import spacy
+            nlp = spacy.blank("en")
+            nlp.add_pipe("sentencizer")
+            return nlp
+        raise ValueError(f"Unknown SPACY_SENTENCE_MODE: {mode}")
+
+    return _get_or_load(f"spacy-sentences:{mode}:{SPACY_MODEL_NAME}", load)
+
+
+def get_registry_report():
+    """
+    Returns load time and resident memory per loaded resource, plus current process RSS.
+    """
+    with _lock:
+        loaded = {name: dict(stats) for name, stats in _load_report.items()}
+    return {
+        "loaded": loaded,
+        "process_rss_bytes": _current_rss_bytes(),
+    }
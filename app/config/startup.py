@@ -0,0 +1,60 @@
+import os
+import time
+import importlib
+
+# Cold-start bookkeeping: how long each top-level module took to import,
+# and an optional warm-up for pre-fork servers (gunicorn --preload).
+
+_process_started = time.perf_counter()
+_import_times = {}
+_warm_up_times = {}
+
+
+def timed_import(module_name):
+    """Import `module_name` and record how long it took (including its own imports)."""
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    _import_times[module_name] = round(time.perf_counter() - started, 4)
+    return module
+
+
+def warm_up(include_vector_store=False):
+    """
+    Load the heavy dependencies ahead of the first request.
+
+    Meant to run once in the master process of a pre-fork server so the workers share
+    the loaded models copy-on-write. The Chroma client holds SQLite handles that must not
+    cross a fork, so it is only opened here when `include_vector_store` is set.
+    """
+    from app.config import model_registry
+    from app.services import llm_service
+
+    steps = [
+        ("embedder", model_registry.get_embedder),
+        ("spacy", model_registry.get_sentence_nlp),
+        ("gemini", llm_service.get_gemini_model),
+    ]
+    if include_vector_store:
+        steps.append(("chroma", model_registry.get_collection))
+
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"[WARM-UP] {name} failed: {e}")
+            continue
+        _warm_up_times[name] = round(time.perf_counter() - started, 4)
+
+
+def should_warm_up():
+    return os.environ.get("WARM_UP_ON_START", "").lower() in ("1", "true", "yes")
+
+
+def get_startup_report():
+    return {
+        "imports_seconds": dict(_import_times),
+        "total_import_seconds": round(sum(_import_times.values()), 4),
+        "warm_up_seconds": dict(_warm_up_times),
+        "uptime_seconds": round(time.perf_counter() - _process_started, 1),
+    }
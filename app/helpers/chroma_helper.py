@@ -0,0 +1,66 @@
+import os
+from app.config.model_registry import get_embedder, EMBEDDING_MODEL_NAME
+from app.helpers.embedding_cache import cached_embed
+
+# Chunks are embedded and written to Chroma this many at a time
+INDEX_BATCH_SIZE = int(os.environ.get("INDEX_BATCH_SIZE", "64"))
+
+
+def embed_texts(texts, batch_size=INDEX_BATCH_SIZE):
+    """
+    Embed `texts` with the shared SentenceTransformer in batched forward passes.
+    Texts already in the on-disk embedding cache skip the model entirely.
+    """
+    def encode(missing):
+        return get_embedder().encode(missing, batch_size=batch_size, convert_to_numpy=True).tolist()
+
+    return cached_embed(EMBEDDING_MODEL_NAME, texts, encode)
+
+
+def upsert_chunks(collection, ids, documents, metadatas, batch_size=INDEX_BATCH_SIZE, embed=embed_texts):
+    """
+    Embed and upsert chunks in batches of `batch_size`: one forward pass and one
+    Chroma write transaction per batch instead of per chunk.
+    Returns the number of chunks written.
+    """
+    batch_size = max(1, int(batch_size))
+    for start in range(0, len(documents), batch_size):
+        end = start + batch_size
+        batch_docs = documents[start:end]
+        collection.upsert(
+            ids=ids[start:end],
+            documents=batch_docs,
+            metadatas=metadatas[start:end],
+            embeddings=embed(batch_docs, batch_size=batch_size)
+        )
+    return len(documents)
+
+
+def upsert_chunk_stream(collection, chunks, make_id, make_metadata, batch_size=INDEX_BATCH_SIZE, embed=embed_texts):
+    """
+    Like upsert_chunks, for an iterator of chunks: only one batch is held in memory at a time.
+    `make_id(idx)` / `make_metadata(idx)` build the id and metadata of the idx-th chunk.
+    Returns the number of chunks written.
+    """
+    batch_size = max(1, int(batch_size))
+    batch, written = [], 0
+
+    def flush():
+        start = written - len(batch)
+        collection.upsert(
+            ids=[make_id(idx) for idx in range(start, written)],
+            documents=batch,
+            metadatas=[make_metadata(idx) for idx in range(start, written)],
+            embeddings=embed(batch, batch_size=batch_size)
+        )
+
+    for chunk in chunks:
+        batch.append(chunk)
+        written += 1
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+
+    if batch:
+        flush()
+    return written
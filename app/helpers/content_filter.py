@@ -0,0 +1,165 @@
+import os
+import re
+import math
+import threading
+from app.helpers.text_cleaner import classify_paragraphs
+
+# Tiered usefulness filter for preprocess_uploaded_text. Each paragraph gets a local
+# P(useful) from (1) cheap text features and (2) its MiniLM embedding's distance to
+# "educational" vs "debris" centroids. Paragraphs above CONTENT_FILTER_KEEP_ABOVE are kept
+# and below CONTENT_FILTER_DROP_BELOW dropped without an LLM call; only the gray zone in
+# between escalates to the LLM (classify_paragraphs). DROP_BELOW=0, KEEP_ABOVE=1 sends
+# every paragraph to the LLM, as before.
+
+CONTENT_FILTER_DROP_BELOW = float(os.environ.get("CONTENT_FILTER_DROP_BELOW", "0.35"))
+CONTENT_FILTER_KEEP_ABOVE = float(os.environ.get("CONTENT_FILTER_KEEP_ABOVE", "0.65"))
+# Share of the local score that comes from the embedding centroids (rest: text features)
+CONTENT_FILTER_EMBEDDING_WEIGHT = float(os.environ.get("CONTENT_FILTER_EMBEDDING_WEIGHT", "0.5"))
+
+# Seed examples for the centroid classifier
+USEFUL_EXAMPLES = [
+    "Gradient descent iteratively updates the parameters in the direction that reduces the loss function.",
+    "A derivative measures how a function's output changes as its input changes.",
+    "In this chapter we explain how a hash table maps keys to values using a hash function.",
+    "Example: suppose a train travels 120 km in 2 hours; its average speed is 60 km per hour.",
+    "Exercise: prove that the sum of the first n odd numbers is n squared.",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "The key idea of recursion is to solve a problem by reducing it to smaller instances of itself.",
+    "Supply and demand determine the market price at which the quantity supplied equals the quantity demanded.",
+]
+DEBRIS_EXAMPLES = [
+    "Table of Contents 1 Introduction ........ 1 2 Background ........ 7 3 Methods ........ 15",
+    "References [1] Smith, J. (2019). Deep learning. Journal of AI, 12(3), 45-67. doi:10.1000/xyz",
+    "Page 12 of 240",
+    "Copyright 2021 Example Press. All rights reserved. No part of this publication may be reproduced.",
+    "Answer key: 1. b 2. d 3. a 4. c 5. a 6. b",
+    "Figure 3.2 Table 3.1 Figure 3.3 Table 3.2",
+    "ISBN 978-0-00-000000-0 Printed in the United States of America 10 9 8 7 6 5 4 3 2 1",
+    "Index algorithm, 12, 45; array, 3, 18-20; binary search, 77; graph, 102-110",
+]
+
+_centroid_lock = threading.Lock()
+_centroids = None
+
+_stats_lock = threading.Lock()
+_stats = {"paragraphs": 0, "kept_local": 0, "dropped_local": 0, "escalated": 0}
+
+_LEADER_RE = re.compile(r"\.{4,}|(?:\. ){3,}")
+_CITATION_RE = re.compile(r"\bet al\.|\bdoi\b|\bpp\.|\(\d{4}\)|\[\d+\]|\bISBN\b|\bvol\.", re.IGNORECASE)
+
+
+def paragraph_features(text):
+    """
+    Cheap per-paragraph signals. Paragraphs are whitespace-joined sentences (fix_text has
+    already folded line breaks), so token-level ratios stand in for line-length statistics.
+    """
+    import textstat
+
+    chars = len(text) or 1
+    tokens = text.split()
+    return {
+        "digit_ratio": sum(c.isdigit() for c in text) / chars,
+        "punct_ratio": sum(not c.isalnum() and not c.isspace() for c in text) / chars,
+        "alpha_ratio": sum(c.isalpha() for c in text) / chars,
+        "short_token_ratio": sum(len(token) <= 2 for token in tokens) / len(tokens) if tokens else 1.0,
+        "leader_runs": len(_LEADER_RE.findall(text)),
+        "citation_marks": len(_CITATION_RE.findall(text)),
+        "readability": textstat.flesch_reading_ease(text),
+    }
+
+
+def feature_score(features):
+    """Heuristic P(useful) in [0, 1]: plain prose starts high, each debris signal pulls it down."""
+    score = 0.8
+    score -= min(0.5, max(0.0, features["digit_ratio"] - 0.05) * 3)
+    score -= min(0.3, max(0.0, features["punct_ratio"] - 0.08) * 3)
+    score -= min(0.3, max(0.0, 0.7 - features["alpha_ratio"]) * 2)
+    score -= min(0.3, max(0.0, features["short_token_ratio"] - 0.35))
+    score -= min(0.4, 0.2 * features["leader_runs"])
+    score -= min(0.4, 0.1 * features["citation_marks"])
+    if features["readability"] < 0:
+        score -= 0.15
+    return max(0.0, min(1.0, score))
+
+
+def _normalize(matrix):
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+def _get_centroids():
+    """Unit-length (useful, debris) centroids of the seed examples, embedded once per process."""
+    global _centroids
+    if _centroids is None:
+        with _centroid_lock:
+            if _centroids is None:
+                import numpy as np
+                from app.helpers.chroma_helper import embed_texts
+
+                vectors = _normalize(np.asarray(embed_texts(USEFUL_EXAMPLES + DEBRIS_EXAMPLES), dtype=np.float32))
+                useful = _normalize(vectors[:len(USEFUL_EXAMPLES)].mean(axis=0))
+                debris = _normalize(vectors[len(USEFUL_EXAMPLES):].mean(axis=0))
+                _centroids = (useful, debris)
+    return _centroids
+
+
+def embedding_scores(paragraphs):
+    """P(useful) per paragraph from how much closer its embedding is to the useful centroid."""
+    import numpy as np
+    from app.helpers.chroma_helper import embed_texts
+
+    useful, debris = _get_centroids()
+    vectors = _normalize(np.asarray(embed_texts(paragraphs), dtype=np.float32))
+    margins = vectors @ useful - vectors @ debris
+    return [1.0 / (1.0 + math.exp(-10.0 * float(margin))) for margin in margins]
+
+
+def local_scores(paragraphs):
+    """Combined local P(useful) per paragraph (features + embedding centroids)."""
+    weight = CONTENT_FILTER_EMBEDDING_WEIGHT
+    features = [feature_score(paragraph_features(paragraph)) for paragraph in paragraphs]
+    if weight <= 0:
+        return features
+    embedded = embedding_scores(paragraphs)
+    return [(1 - weight) * f + weight * e for f, e in zip(features, embedded)]
+
+
+def filter_paragraphs(paragraphs):
+    """Usefulness verdict per paragraph (same order); only gray-zone paragraphs cost an LLM call."""
+    if not paragraphs:
+        return []
+
+    verdicts = [None] * len(paragraphs)
+    gray = []
+    if CONTENT_FILTER_DROP_BELOW <= 0 and CONTENT_FILTER_KEEP_ABOVE >= 1:
+        gray = list(range(len(paragraphs)))  # tiers disabled: everything goes to the LLM
+    else:
+        for idx, score in enumerate(local_scores(paragraphs)):
+            if score >= CONTENT_FILTER_KEEP_ABOVE:
+                verdicts[idx] = True
+            elif score <= CONTENT_FILTER_DROP_BELOW:
+                verdicts[idx] = False
+            else:
+                gray.append(idx)
+
+    with _stats_lock:
+        _stats["paragraphs"] += len(paragraphs)
+        _stats["kept_local"] += verdicts.count(True)
+        _stats["dropped_local"] += verdicts.count(False)
+        _stats["escalated"] += len(gray)
+
+    if gray:
+        for idx, verdict in zip(gray, classify_paragraphs([paragraphs[idx] for idx in gray])):
+            verdicts[idx] = verdict
+    return verdicts
+
+
+def get_content_filter_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["escalation_rate"] = round(stats["escalated"] / stats["paragraphs"], 4) if stats["paragraphs"] else 0.0
+    stats["drop_below"] = CONTENT_FILTER_DROP_BELOW
+    stats["keep_above"] = CONTENT_FILTER_KEEP_ABOVE
+    return stats
@@ -21,37 +21,116 @@
 # def chunk_text(text: str) -> list:
 #     splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
 #     return splitter.split_text(text)
-import fitz  # PyMuPDF
-import docx
-import requests
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-import numpy as np
+# PyMuPDF, python-docx, requests and langchain are imported on first use to keep start-up fast
 
-semantic_embedder  = SentenceTransformer("all-MiniLM-L6-v2")
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
 
-def download_and_read_file(url: str) -> str:
-    response = requests.get(url)
-    if url.endswith(".pdf"):
-        with open("temp.pdf", "wb") as f:
-            f.write(response.content)
-        doc = fitz.open("temp.pdf")
-        return "\n".join([page.get_text() for page in doc])
-    elif url.endswith(".docx"):
-        with open("temp.docx", "wb") as f:
-            f.write(response.content)
-        doc = docx.Document("temp.docx")
-        return "\n".join([para.text for para in doc.paragraphs])
+
+def iter_pdf_pages(data: bytes, parallel: bool = False):
+    """
+    Yield the text of each PDF page, opened straight from memory (no temp file).
+    With `parallel`, large PDFs are extracted by a process pool, still yielded in page order.
+    """
+    import fitz  # PyMuPDF
+    from app.helpers.parallel_extraction import should_extract_in_parallel, iter_pages_parallel
+
+    doc = fitz.open(stream=data, filetype="pdf")
+    if parallel and should_extract_in_parallel(doc.page_count):
+        page_count = doc.page_count
+        doc.close()
+        yield from iter_pages_parallel(data, page_count, engine="pymupdf")
+        return
+    try:
+        for page in doc:
+            yield page.get_text()
+    finally:
+        doc.close()
+
+def read_pdf_text(data: bytes) -> str:
+    """Full text of a PDF; large documents are extracted in a process pool."""
+    import fitz  # PyMuPDF
+    from app.helpers.parallel_extraction import should_extract_in_parallel, extract_pages_parallel
+
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        page_count = doc.page_count
+        if not should_extract_in_parallel(page_count):
+            return "\n".join(page.get_text() for page in doc)
+
+    return "\n".join(extract_pages_parallel(data, page_count, engine="pymupdf"))
+
+def iter_docx_paragraphs(data: bytes):
+    """Yield the text of each DOCX paragraph, opened straight from memory (no temp file)."""
+    import io
+    import docx
+
+    doc = docx.Document(io.BytesIO(data))
+    for para in doc.paragraphs:
+        yield para.text
+
+def iter_document_text(data: bytes, filename: str, parallel: bool = False):
+    """
+    Yield a document's text part by part (PDF pages / DOCX paragraphs). `parallel` lets
+    large PDFs use the extraction pool; leave it off when only the first pages are read.
+    """
+    if filename.lower().endswith(".pdf"):
+        return iter_pdf_pages(data, parallel)
+    elif filename.lower().endswith(".docx"):
+        return iter_docx_paragraphs(data)
     else:
         raise ValueError("Unsupported file type.")
 
+def download_and_read_file(url: str) -> str:
+    import requests
+
+    response = requests.get(url)
+    # Strip the query string (e.g. Storage download tokens) before checking the extension
+    path = url.split("?", 1)[0]
+    if path.lower().endswith(".pdf"):
+        return read_pdf_text(response.content)
+    return "\n".join(iter_document_text(response.content, path))
+
+def _get_splitter():
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+
 def chunk_text(text: str) -> list:
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    return splitter.split_text(text)
+    return _get_splitter().split_text(text)
+
+def iter_chunks(text_parts, window=CHUNK_SIZE * 8):
+    """
+    Incremental chunk_text: consumes text parts (e.g. pages) as they arrive and
+    yields chunks while holding roughly `window` characters, not the whole document.
+    """
+    splitter = _get_splitter()
+    buffer = ""
+    for part in text_parts:
+        buffer = f"{buffer}\n{part}" if buffer else part
+        if len(buffer) < window:
+            continue
+
+        chunks = splitter.split_text(buffer)
+        # The last chunk may continue into the next part, so carry it over
+        for chunk in chunks[:-1]:
+            yield chunk
+        buffer = chunks[-1] if chunks else ""
+
+    if buffer:
+        yield from splitter.split_text(buffer)
+
+def has_enough_text(text_parts, min_chars=50):
+    """Streaming parsability check: stops reading as soon as `min_chars` of text were seen."""
+    seen = 0
+    for part in text_parts:
+        seen += len(part.strip())
+        if seen > min_chars:
+            return True
+    return False
+
 # def chunk_text(text: str, similarity_threshold=0.5, max_chunk_len=1000):
 #     sentences = [s.strip() for s in text.split('.') if s.strip()]
-#     embeddings = semantic_embedder .encode(sentences)
+#     embeddings = get_embedder().encode(sentences)  # from app.config.model_registry
     
 #     chunks, current_chunk, current_vecs = [], [], []
 #     for i, (sent, vec) in enumerate(zip(sentences, embeddings)):
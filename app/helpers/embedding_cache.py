@@ -0,0 +1,83 @@
+import os
+import hashlib
+from app.helpers.sqlite_lru import SQLiteLRUStore
+
+# Disk-backed embedding cache keyed by (model name, sha256(text)), so chunk texts and
+# repeat queries are only run through the model once. Least-recently-used entries are
+# evicted once the stored vectors exceed EMBEDDING_CACHE_MAX_BYTES (0 disables the cache).
+
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", os.path.join("embedding_cache", "embeddings.sqlite3"))
+EMBEDDING_CACHE_MAX_BYTES = int(os.environ.get("EMBEDDING_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def _encode(vector):
+    import numpy as np
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _decode(blob):
+    import numpy as np
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+
+def _open_store():
+    return SQLiteLRUStore(EMBEDDING_CACHE_PATH, "embedding_cache", _encode, _decode,
+                          EMBEDDING_CACHE_MAX_BYTES, size_by="bytes")
+
+
+_store = _open_store()
+
+
+def configure(path=None, max_bytes=None):
+    """Point the cache at another file and/or bound (benchmarks, tests)."""
+    global EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_BYTES, _store
+    EMBEDDING_CACHE_PATH = path or EMBEDDING_CACHE_PATH
+    EMBEDDING_CACHE_MAX_BYTES = EMBEDDING_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    _store = _open_store()
+
+
+def _key(model_name, text):
+    return f"{model_name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def cache_enabled():
+    return _store.enabled
+
+
+def get_many(model_name, texts):
+    """Returns {index: vector} for every text in `texts` that is cached."""
+    keys = [_key(model_name, text) for text in texts]
+    found = _store.get_many(keys)
+    return {idx: found[key] for idx, key in enumerate(keys) if key in found}
+
+
+def put_many(model_name, texts, vectors):
+    _store.put_many([(_key(model_name, text), vector) for text, vector in zip(texts, vectors)])
+
+
+def cached_embed(model_name, texts, embed):
+    """
+    Embed `texts`, running `embed(missing_texts)` only for texts not already cached.
+    Returns vectors (lists of floats) in the order of `texts`.
+    """
+    texts = list(texts)
+    if not cache_enabled() or not texts:
+        return embed(texts) if texts else []
+
+    vectors = get_many(model_name, texts)
+    missing = [idx for idx in range(len(texts)) if idx not in vectors]
+    if missing:
+        # Identical texts in one call are embedded once
+        unique = list(dict.fromkeys(texts[idx] for idx in missing))
+        computed = dict(zip(unique, embed(unique)))
+        put_many(model_name, unique, [computed[text] for text in unique])
+        for idx in missing:
+            vectors[idx] = computed[texts[idx]]
+
+    return [vectors[idx] for idx in range(len(texts))]
+
+
+def get_embedding_cache_stats():
+    stats = _store.get_stats()
+    stats["max_bytes"] = EMBEDDING_CACHE_MAX_BYTES
+    return stats
@@ -0,0 +1,98 @@
+import os
+import json
+import hashlib
+import threading
+from app.helpers.sqlite_lru import SQLiteLRUStore
+
+# Disk-backed memo of small LLM outputs (module titles, usefulness verdicts) keyed by
+# (kind, sha256(input text)), so identical text is never sent to the LLM twice.
+# Least-recently-used entries are dropped above LLM_MEMO_MAX_ENTRIES (0 disables the memo).
+
+LLM_MEMO_PATH = os.environ.get("LLM_MEMO_PATH", os.path.join("llm_memo", "memo.sqlite3"))
+LLM_MEMO_MAX_ENTRIES = int(os.environ.get("LLM_MEMO_MAX_ENTRIES", "200000"))
+
+_stats_lock = threading.Lock()
+_stats = {}  # kind -> {"hits": n, "misses": n}
+
+
+def _open_store():
+    return SQLiteLRUStore(LLM_MEMO_PATH, "llm_memo", lambda value: json.dumps(value).encode("utf-8"),
+                          lambda blob: json.loads(blob), LLM_MEMO_MAX_ENTRIES, size_by="entries")
+
+
+_store = _open_store()
+
+
+def configure(path=None, max_entries=None):
+    """Point the memo at another file and/or bound (benchmarks, tests)."""
+    global LLM_MEMO_PATH, LLM_MEMO_MAX_ENTRIES, _store
+    LLM_MEMO_PATH = path or LLM_MEMO_PATH
+    LLM_MEMO_MAX_ENTRIES = LLM_MEMO_MAX_ENTRIES if max_entries is None else max_entries
+    _store = _open_store()
+
+
+def _key(kind, text):
+    return f"{kind}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def _count(kind, hits, misses):
+    with _stats_lock:
+        counters = _stats.setdefault(kind, {"hits": 0, "misses": 0})
+        counters["hits"] += hits
+        counters["misses"] += misses
+
+
+def memo_enabled():
+    return _store.enabled
+
+
+def get_many(kind, texts):
+    """Returns {index: value} for every text in `texts` with a memoized `kind` result."""
+    keys = [_key(kind, text) for text in texts]
+    found = _store.get_many(keys)
+    hits = {idx: found[key] for idx, key in enumerate(keys) if key in found}
+    _count(kind, len(hits), len(keys) - len(hits))
+    return hits
+
+
+def put_many(kind, texts, values):
+    _store.put_many([(_key(kind, text), value) for text, value in zip(texts, values)])
+
+
+def memoized(kind, texts, compute):
+    """
+    Results for `texts`, running `compute(missing_texts)` only for texts without a memoized result.
+    `compute` returns one value per text; None means "failed" and is returned but not memoized.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    if not memo_enabled():
+        return list(compute(texts))
+
+    values = get_many(kind, texts)
+    missing = [idx for idx in range(len(texts)) if idx not in values]
+    if missing:
+        # Identical texts in one call are computed once
+        unique = list(dict.fromkeys(texts[idx] for idx in missing))
+        computed = dict(zip(unique, compute(unique)))
+        successful = [text for text in unique if computed[text] is not None]
+        if successful:
+            put_many(kind, successful, [computed[text] for text in successful])
+        for idx in missing:
+            values[idx] = computed[texts[idx]]
+
+    return [values[idx] for idx in range(len(texts))]
+
+
+def get_llm_memo_stats():
+    with _stats_lock:
+        stats = {kind: dict(counters) for kind, counters in _stats.items()}
+    for counters in stats.values():
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+
+    report = {"kinds": stats, "max_entries": LLM_MEMO_MAX_ENTRIES}
+    if memo_enabled():
+        report["entries"] = _store.get_stats()["entries"]
+    return report
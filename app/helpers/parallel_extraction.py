@@ -0,0 +1,93 @@
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Page-range PDF extraction in a process pool, for documents large enough
+# that spreading pages across cores beats the cost of starting the workers.
+
+PARALLEL_EXTRACTION_MIN_PAGES = int(os.environ.get("PARALLEL_EXTRACTION_MIN_PAGES", "200"))
+PARALLEL_EXTRACTION_WORKERS = int(os.environ.get("PARALLEL_EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+PAGES_PER_TASK = 25
+# Page ranges submitted ahead of the consumer per worker when iterating (bounds memory)
+RANGES_IN_FLIGHT_PER_WORKER = 2
+
+# Set once per worker process by the pool initializer so the PDF bytes are
+# shipped to each worker once, not once per page range
+_worker_data = None
+
+
+def _init_worker(data):
+    global _worker_data
+    _worker_data = data
+
+
+def _pymupdf_page_range(start, end):
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(stream=_worker_data, filetype="pdf")
+    try:
+        return [doc[i].get_text() for i in range(start, end)]
+    finally:
+        doc.close()
+
+
+def _pdfplumber_page_range(start, end):
+    import io
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(_worker_data)) as pdf:
+        return [pdf.pages[i].extract_text() or '' for i in range(start, end)]
+
+
+_ENGINES = {
+    "pymupdf": _pymupdf_page_range,
+    "pdfplumber": _pdfplumber_page_range,
+}
+
+
+def should_extract_in_parallel(page_count, workers=None):
+    return (workers or PARALLEL_EXTRACTION_WORKERS) > 1 and page_count >= PARALLEL_EXTRACTION_MIN_PAGES
+
+
+def iter_pages_parallel(data, page_count, engine="pymupdf", workers=None, pages_per_task=PAGES_PER_TASK):
+    """
+    Yield the text of every page of the PDF in `data`, in page order, while a process pool
+    extracts the following page ranges. Only a few ranges per worker are in flight, so
+    memory stays bounded however long the document is.
+    """
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    if not ranges:
+        return
+
+    worker_count = min(workers or PARALLEL_EXTRACTION_WORKERS, len(ranges))
+    # spawn, not fork: the API process is multi-threaded and forking it can deadlock
+    context = multiprocessing.get_context("spawn")
+
+    pool = ProcessPoolExecutor(max_workers=worker_count, mp_context=context,
+                               initializer=_init_worker, initargs=(data,))
+    try:
+        pending = deque()
+        next_range = iter(ranges)
+        for start, end in next_range:
+            pending.append(pool.submit(_ENGINES[engine], start, end))
+            if len(pending) >= worker_count * RANGES_IN_FLIGHT_PER_WORKER:
+                break
+        while pending:
+            texts = pending.popleft().result()
+            # Keep the pool busy while the caller consumes this range
+            for start, end in next_range:
+                pending.append(pool.submit(_ENGINES[engine], start, end))
+                break
+            yield from texts
+    finally:
+        # Also reached when the caller stops early: drop the ranges nobody will read
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def extract_pages_parallel(data, page_count, engine="pymupdf", workers=None, pages_per_task=PAGES_PER_TASK):
+    """
+    Extract the text of every page of the PDF in `data` across a process pool.
+    Returns: list of page texts, in page order
+    """
+    return list(iter_pages_parallel(data, page_count, engine, workers, pages_per_task))
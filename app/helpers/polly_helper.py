@@ -1,13 +1,21 @@
 import uuid
-import boto3
-from google.cloud import storage
-from google.oauth2 import service_account
 import os
 import html
 
-polly_client = boto3.client("polly", region_name="us-east-1")
+_polly_client = None
+
+def get_polly_client():
+    """boto3 is slow to import, so the Polly client is created on first use."""
+    global _polly_client
+    if _polly_client is None:
+        import boto3
+        _polly_client = boto3.client("polly", region_name="us-east-1")
+    return _polly_client
 
 def synthesize_speech(text, emotion):
+    from google.cloud import storage
+    from google.oauth2 import service_account
+
     # GCP creds (service account that can write to the bucket)
     credentials = service_account.Credentials.from_service_account_file(
         os.path.join(os.path.dirname(__file__), "../../firebase_token.json")
@@ -30,7 +38,7 @@ def synthesize_speech(text, emotion):
     ssml = f"<speak>{prosody}{escaped_text}</prosody></speak>"
 
     # Polly
-    resp = polly_client.synthesize_speech(
+    resp = get_polly_client().synthesize_speech(
         Engine="neural",             # or "standard"
         OutputFormat="mp3",
         TextType="ssml",
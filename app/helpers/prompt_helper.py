@@ -1,3 +1,5 @@
+import json
+
 # def get_prompt(question, content, emotion):
 #     tone_instruction = {
 #         "happy": "Use an engaging and enthusiastic tone.",
@@ -28,8 +30,11 @@
 #   "supporting_texts": ["<supporting text 1>", "<supporting text 2>"]
 # }}
 # """
-def get_prompt(question, content, emotion):
-    tone_instruction = {
+# Marks the end of the streamed answer text in get_stream_prompt responses
+SUPPORTING_TEXTS_MARKER = "SUPPORTING_TEXTS:"
+
+def get_tone_instruction(emotion):
+    return {
         "happy": "Use an engaging and enthusiastic tone.",
         "sad": "Be empathetic and gently explain.",
         "angry": "Be calm and direct.",
@@ -37,6 +42,9 @@ def get_prompt(question, content, emotion):
         "neutral": "Provide a clear and factual explanation."
     }.get(emotion, "Be clear and concise.")
 
+def get_prompt(question, content, emotion):
+    tone_instruction = get_tone_instruction(emotion)
+
     return f"""
 You are an AI tutor. Answer the following question using **only the provided context**.
 
@@ -58,3 +66,55 @@ Return **only** a valid JSON object like:
   "supporting_texts": ["<supporting text 1>", "<supporting text 2>"]
 }}
 """
+
+def get_stream_prompt(question, content, emotion):
+    """
+    Variant of get_prompt for streaming: the answer comes first as plain text so it can be
+    forwarded token by token, followed by the supporting texts as a JSON array.
+    """
+    tone_instruction = get_tone_instruction(emotion)
+
+    return f"""
+You are an AI tutor. Answer the following question using **only the provided context**.
+
+Strictly stay within the context provided below. Do not make up any information.
+If the answer is not present, say: "I don't know" or "I cannot answer this question based on the provided content."
+
+Tone: {tone_instruction}
+
+Question: "{question}"
+
+Context:
+{content}
+
+Answer in 3–5 sentences using clear educational language.
+
+Write the answer as plain text (no JSON, no markdown code fences). Then, on a new line, write
+{SUPPORTING_TEXTS_MARKER} followed by a JSON array of the supporting texts, exactly like:
+<your answer here>
+{SUPPORTING_TEXTS_MARKER} ["<supporting text 1>", "<supporting text 2>"]
+"""
+
+def number_items(texts):
+    """Items for a batched prompt: `[0]`, `[1]`, ... each followed by the triple-quoted text."""
+    return "\n\n".join(f'[{idx}]\n"""\n{text}\n"""' for idx, text in enumerate(texts))
+
+def parse_indexed_json(raw, list_key, value_key, count):
+    """
+    Read a batched answer like {"<list_key>": [{"index": 0, "<value_key>": ...}, ...]}.
+    Returns `count` values in index order; entries that are missing or malformed are None.
+    Raises ValueError if `raw` is not JSON.
+    """
+    parsed = json.loads(raw)
+    values = [None] * count
+    entries = parsed.get(list_key, []) if isinstance(parsed, dict) else []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            idx = int(entry.get("index"))
+        except (TypeError, ValueError):
+            continue
+        if 0 <= idx < count and entry.get(value_key) is not None:
+            values[idx] = entry[value_key]
+    return values
@@ -0,0 +1,102 @@
+import os
+import copy
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+# In-process read-through cache for small Firestore reads that repeat on every request
+# (module summaries, full modules). Keys are tuples starting with (email, document_id),
+# so every entry of a document can be dropped at once with invalidate((email, document_id)).
+# Entries expire after READ_CACHE_TTL_SECONDS; least-recently-used ones are evicted once the
+# estimated size exceeds READ_CACHE_MAX_BYTES (0 disables the cache). Writers invalidate the
+# keys they change; the TTL bounds staleness from writes made by other processes.
+
+READ_CACHE_TTL_SECONDS = int(os.environ.get("READ_CACHE_TTL_SECONDS", "300"))
+READ_CACHE_MAX_BYTES = int(os.environ.get("READ_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> {"value", "nbytes", "expires_at"}, least recently used first
+_bytes = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+
+def _estimate_size(value):
+    """Rough deep size in bytes of Firestore-shaped data (dicts, lists, strings, numbers)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_estimate_size(item) for item in value)
+    return size
+
+
+def _remove(key):
+    global _bytes
+    _bytes -= _entries.pop(key)["nbytes"]
+
+
+def get(key):
+    """Cached value (a copy, so callers may mutate it) or None."""
+    now = time.time()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry["expires_at"] <= now:
+            _remove(key)
+            _stats["expirations"] += 1
+            entry = None
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        _entries.move_to_end(key)
+        _stats["hits"] += 1
+        value = entry["value"]
+    return copy.deepcopy(value)
+
+
+def put(key, value):
+    """Cache `value` (None is never cached: "not there yet" must be re-read)."""
+    global _bytes
+    if value is None or READ_CACHE_MAX_BYTES <= 0:
+        return
+    nbytes = _estimate_size(value)
+    if nbytes > READ_CACHE_MAX_BYTES:
+        return
+    value = copy.deepcopy(value)
+    with _lock:
+        if key in _entries:
+            _remove(key)
+        _entries[key] = {"value": value, "nbytes": nbytes, "expires_at": time.time() + READ_CACHE_TTL_SECONDS}
+        _bytes += nbytes
+        while _bytes > READ_CACHE_MAX_BYTES:
+            _remove(next(iter(_entries)))
+            _stats["evictions"] += 1
+
+
+def read_through(key, load):
+    """Cached value for `key`, else load() (cached unless None)."""
+    value = get(key)
+    if value is None:
+        value = load()
+        put(key, value)
+    return value
+
+
+def invalidate(prefix):
+    """Drop every entry whose key starts with the tuple `prefix`."""
+    with _lock:
+        keys = [key for key in _entries if key[:len(prefix)] == prefix]
+        for key in keys:
+            _remove(key)
+        _stats["invalidations"] += len(keys)
+
+
+def get_read_cache_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_entries)
+        stats["bytes"] = _bytes
+    stats["max_bytes"] = READ_CACHE_MAX_BYTES
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
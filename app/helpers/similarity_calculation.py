@@ -1,16 +1,13 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import math
+
+# Each (original, cleaned) pair is scored as if a TfidfVectorizer had been fitted on just
+# those two texts (smooth idf, l2 norm): a term in both texts gets idf 1, a term in only
+# one gets idf ln(3/2) + 1. That per-pair idf is reproduced from one shared count matrix,
+# so a whole document's modules are scored in a single vectorized pass.
+_IDF_SINGLE = math.log(1.5) + 1.0
 
-def get_similarity_and_confidence(original_text, cleaned_text):
-    """
-    Returns:
-    - similarity (as percentage, 0–100)
-    - confidence score (as percentage, 0–100)
-    """
-    vectorizer = TfidfVectorizer().fit([original_text, cleaned_text])
-    vectors = vectorizer.transform([original_text, cleaned_text])
-    similarity = cosine_similarity(vectors[0], vectors[1])[0][0]
 
+def _to_percentages(similarity, original_text, cleaned_text):
     retention_ratio = len(cleaned_text) / len(original_text) if len(original_text) > 0 else 0
 
     # Compute raw confidence out of 10
@@ -22,3 +19,55 @@ def get_similarity_and_confidence(original_text, cleaned_text):
     confidence_percent = round(raw_confidence * 10, 2)  # since it's out of 10
 
     return similarity_percent, confidence_percent
+
+
+def get_similarity_and_confidence_batch(pairs):
+    """
+    Scores many (original_text, cleaned_text) pairs at once.
+    Returns a (similarity %, confidence %) tuple per pair, equal to get_similarity_and_confidence.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return []
+
+    # scikit-learn/numpy are imported lazily to keep app start-up fast
+    import numpy as np
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    texts = [text for pair in pairs for text in pair]
+    try:
+        counts = CountVectorizer().fit_transform(texts).astype(np.float64).tocsr()
+    except ValueError:
+        # No pair has a single token: nothing to compare
+        return [_to_percentages(0.0, original, cleaned) for original, cleaned in pairs]
+
+    original, cleaned = counts[0::2], counts[1::2]
+    in_original, in_cleaned = original.copy(), cleaned.copy()
+    in_original.data[:] = 1.0
+    in_cleaned.data[:] = 1.0
+
+    # Shared terms have idf 1 on both sides, so the dot product is just the shared counts
+    dot = np.asarray(original.multiply(cleaned).sum(axis=1)).ravel()
+
+    def squared_norm(matrix, in_other):
+        # Unshared terms are weighted by _IDF_SINGLE, shared terms by 1
+        total = np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+        shared = np.asarray(matrix.multiply(matrix).multiply(in_other).sum(axis=1)).ravel()
+        return _IDF_SINGLE ** 2 * (total - shared) + shared
+
+    norms = np.sqrt(squared_norm(original, in_cleaned) * squared_norm(cleaned, in_original))
+    similarities = np.divide(dot, norms, out=np.zeros_like(dot), where=norms > 0)
+
+    return [
+        _to_percentages(float(similarity), original_text, cleaned_text)
+        for similarity, (original_text, cleaned_text) in zip(similarities, pairs)
+    ]
+
+
+def get_similarity_and_confidence(original_text, cleaned_text):
+    """
+    Returns:
+    - similarity (as percentage, 0–100)
+    - confidence score (as percentage, 0–100)
+    """
+    return get_similarity_and_confidence_batch([(original_text, cleaned_text)])[0]
@@ -0,0 +1,140 @@
+import os
+import time
+import sqlite3
+import threading
+
+# Disk-backed key/value store with least-recently-used eviction, shared by the embedding
+# cache and the LLM memo. Values are encoded to a BLOB by the caller's codec; the store is
+# bounded either by the total encoded size (bytes) or by the number of entries.
+
+# Evict down to this fraction of the limit so eviction doesn't run on every insert
+_EVICT_TO = 0.9
+# SQLite caps the number of bound parameters per statement
+_MAX_PARAMS = 500
+
+
+class SQLiteLRUStore:
+    def __init__(self, path, table, encode, decode, max_size, size_by="bytes"):
+        """
+        `size_by` is "bytes" (max_size bounds the sum of encoded value sizes) or "entries".
+        max_size <= 0 disables the store.
+        """
+        self.path = path
+        self.table = table
+        self.encode = encode
+        self.decode = decode
+        self.max_size = max_size
+        self.size_by = size_by
+        # One connection per thread (and process: connections must not cross a fork),
+        # reused for every call; the schema is created once per process
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_pid = None
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def _init_schema(self, conn):
+        with self._schema_lock:
+            if self._schema_pid == os.getpid():
+                return
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {self.table} (
+                        key       TEXT PRIMARY KEY,
+                        value     BLOB NOT NULL,
+                        nbytes    INTEGER NOT NULL,
+                        last_used REAL NOT NULL
+                    )
+                """)
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_used ON {self.table} (last_used)")
+            self._schema_pid = os.getpid()
+
+    def _connect(self):
+        """This thread's connection; use as `with self._connect() as conn:` for one transaction."""
+        local = self._local
+        if getattr(local, "conn", None) is None or local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._init_schema(conn)
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def _count(self, counter, amount):
+        with self._stats_lock:
+            self._stats[counter] += amount
+
+    def get_many(self, keys):
+        """Returns {key: value} for every key that is stored (and marks them as used)."""
+        found = {}
+        with self._connect() as conn:
+            for start in range(0, len(keys), _MAX_PARAMS):
+                batch = keys[start:start + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders})", batch)
+                hits = {key: self.decode(value) for key, value in rows}
+                if hits:
+                    conn.execute(
+                        f"UPDATE {self.table} SET last_used = ? WHERE key IN ({','.join('?' * len(hits))})",
+                        [time.time(), *hits]
+                    )
+                found.update(hits)
+
+        hits = sum(1 for key in keys if key in found)
+        self._count("hits", hits)
+        self._count("misses", len(keys) - hits)
+        return found
+
+    def put_many(self, items):
+        """Store (key, value) pairs, then evict least recently used entries above the bound."""
+        now = time.time()
+        rows = []
+        for key, value in items:
+            blob = self.encode(value)
+            rows.append((key, blob, len(blob), now))
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, nbytes, last_used) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._evict(conn)
+
+    def _size(self, conn):
+        measure = "COALESCE(SUM(nbytes), 0)" if self.size_by == "bytes" else "COUNT(*)"
+        return conn.execute(f"SELECT {measure} FROM {self.table}").fetchone()[0]
+
+    def _evict(self, conn):
+        used = self._size(conn)
+        if used <= self.max_size:
+            return
+
+        target = int(self.max_size * _EVICT_TO)
+        evicted = []
+        for key, nbytes in conn.execute(f"SELECT key, nbytes FROM {self.table} ORDER BY last_used"):
+            if used <= target:
+                break
+            evicted.append((key,))
+            used -= nbytes if self.size_by == "bytes" else 1
+        conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", evicted)
+        self._count("evictions", len(evicted))
+
+    def get_stats(self):
+        """Hit/miss/eviction counters and hit rate, plus entries and bytes used when enabled."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        if self.enabled:
+            with self._connect() as conn:
+                entries, used = conn.execute(
+                    f"SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM {self.table}"
+                ).fetchone()
+            stats["entries"] = entries
+            stats["bytes_used"] = used
+        return stats
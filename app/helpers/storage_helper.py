@@ -1,19 +1,22 @@
-from google.oauth2 import service_account
-from google.cloud import storage
-from google.cloud.firestore_v1.base_query import FieldFilter
-from flask import current_app
 import os
 import uuid
 
 
 
-def upload_file_to_storage(file, filename, folder):
+def _get_bucket():
+    from google.oauth2 import service_account
+    from google.cloud import storage
+
     credentials = service_account.Credentials.from_service_account_file(
         os.path.join(os.path.dirname(__file__), "../../firebase_token.json")
     )
 
     storage_client = storage.Client(credentials=credentials)
-    bucket = storage_client.bucket('tutor-85bb3.firebasestorage.app') 
+    return storage_client.bucket('tutor-85bb3.firebasestorage.app')
+
+
+def upload_file_to_storage(file, filename, folder):
+    bucket = _get_bucket()
 
     unique_name = f"{folder}/{uuid.uuid4()}_{filename}"
     blob = bucket.blob(unique_name)
@@ -27,3 +30,43 @@ def upload_file_to_storage(file, filename, folder):
 
     # Return public URL (will never expire)
     return blob.public_url, unique_name
+
+
+def upload_bytes_to_storage(data, filename, folder, content_type=None):
+    """Same as upload_file_to_storage, for an upload already read into memory."""
+    bucket = _get_bucket()
+
+    unique_name = f"{folder}/{uuid.uuid4()}_{filename}"
+    blob = bucket.blob(unique_name)
+
+    blob.upload_from_string(data, content_type=content_type)
+
+    # Make the blob public forever
+    blob.make_public()
+
+    # Return public URL (will never expire)
+    return blob.public_url, unique_name
+
+
+def copy_in_storage(source_path, filename, folder):
+    """
+    Server-side copy of an existing object into `folder` (no bytes through this process),
+    public like the uploads. Returns (public_url, storage_path).
+    """
+    bucket = _get_bucket()
+
+    unique_name = f"{folder}/{uuid.uuid4()}_{filename}"
+    blob = bucket.copy_blob(bucket.blob(source_path), bucket, unique_name)
+    blob.make_public()
+    return blob.public_url, unique_name
+
+
+def upload_private_bytes(data, path, content_type=None):
+    """Store bytes at an exact path without making them public (server-side reads only)."""
+    blob = _get_bucket().blob(path)
+    blob.upload_from_string(data, content_type=content_type)
+    return path
+
+
+def download_bytes(path):
+    return _get_bucket().blob(path).download_as_bytes()
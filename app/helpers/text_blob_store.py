@@ -0,0 +1,186 @@
+import os
+import gzip
+import hashlib
+import time
+import tempfile
+import threading
+from app.helpers.storage_helper import upload_private_bytes, download_bytes
+
+# Extracted document text lives in Cloud Storage as a compressed object next to the upload
+# (documents/{email}/{documentName}/{docId}/extracted_text.gz or .zst); the Firestore metadata
+# only keeps a pointer: extractedTextBlob = {path, codec, size, storedSize, sha256}.
+# Reads are lazy and go through a local directory of the compressed objects keyed by sha256,
+# bounded by TEXT_CACHE_MAX_BYTES (least recently used files are removed; 0 disables it).
+#
+# TEXT_BLOB_CODEC is "gzip" (default) or "zstd" (needs the optional `zstandard` package;
+# falls back to gzip without it). Objects record their codec, so both can be read back.
+
+TEXT_BLOB_CODEC = os.environ.get("TEXT_BLOB_CODEC", "gzip").lower()
+TEXT_CACHE_DIR = os.environ.get("TEXT_CACHE_DIR", "text_cache")
+TEXT_CACHE_MAX_BYTES = int(os.environ.get("TEXT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Evict down to this fraction of the limit so eviction doesn't run on every insert
+_EVICT_TO = 0.9
+# Temp files older than this were left by a crashed writer
+_STALE_TMP_SECONDS = 3600
+
+_EXTENSIONS = {"gzip": "gz", "zstd": "zst"}
+
+_cache_lock = threading.Lock()
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _codec():
+    if TEXT_BLOB_CODEC == "zstd" and _zstd() is not None:
+        return "zstd"
+    return "gzip"
+
+
+def compress_text(text):
+    """Returns (compressed bytes, codec)."""
+    data = text.encode("utf-8")
+    codec = _codec()
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=10).compress(data), codec
+    return gzip.compress(data, compresslevel=6), codec
+
+
+def decompress_text(data, codec):
+    if codec == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("This text was stored with zstd: install `zstandard` to read it")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return gzip.decompress(data).decode("utf-8")
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _cache_path(digest, codec):
+    return os.path.join(TEXT_CACHE_DIR, f"{digest}.{codec}")
+
+
+def _cache_get(digest, codec):
+    path = _cache_path(digest, codec)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        os.utime(path)  # mark as recently used
+    except OSError:
+        pass
+    return data
+
+
+def _evict():
+    try:
+        entries = list(os.scandir(TEXT_CACHE_DIR))
+    except OSError:
+        return
+    # Other processes share the directory: any file may vanish between scandir and stat,
+    # and .tmp files are their writes in progress (only ones left by a crash are removed)
+    stats = []
+    now = time.time()
+    for entry in entries:
+        try:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+        except OSError:
+            continue
+        if entry.name.endswith(".tmp"):
+            if now - stat.st_mtime > _STALE_TMP_SECONDS:
+                _remove_quietly(entry.path)
+            continue
+        stats.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in stats)
+    if total <= TEXT_CACHE_MAX_BYTES:
+        return
+    for _, size, path in sorted(stats):
+        if total <= TEXT_CACHE_MAX_BYTES * _EVICT_TO:
+            break
+        _remove_quietly(path)
+        total -= size
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _cache_put(digest, codec, data):
+    """Best effort: a failure of the local cache is logged, never raised to the caller."""
+    if TEXT_CACHE_MAX_BYTES <= 0 or len(data) > TEXT_CACHE_MAX_BYTES:
+        return
+    try:
+        with _cache_lock:
+            os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+            path = _cache_path(digest, codec)
+            # Unique temp name: other processes share the directory (thread ids repeat across them)
+            with tempfile.NamedTemporaryFile(dir=TEXT_CACHE_DIR, suffix=".tmp", delete=False) as f:
+                f.write(data)
+            try:
+                os.replace(f.name, path)
+            except OSError:
+                _remove_quietly(f.name)
+                raise
+            _evict()
+    except Exception as e:
+        print(f"[TEXT CACHE] Caching {digest} failed: {e}")
+
+
+def store_extracted_text(folder, text):
+    """
+    Upload `text` compressed to {folder}/extracted_text.gz|.zst (and keep it in the local
+    cache). Returns the pointer to store as `extractedTextBlob` in the metadata.
+    """
+    data, codec = compress_text(text)
+    digest = text_digest(text)
+    path = upload_private_bytes(
+        data, f"{folder}/extracted_text.{_EXTENSIONS[codec]}", content_type="application/octet-stream"
+    )
+    _cache_put(digest, codec, data)
+    return {
+        "path": path,
+        "codec": codec,
+        "size": len(text.encode("utf-8")),
+        "storedSize": len(data),
+        "sha256": digest
+    }
+
+
+def load_extracted_text(metadata):
+    """
+    Full extracted text of a document's Firestore metadata: inline `extractedText` for
+    documents stored before the blobs, else the `extractedTextBlob` object (local cache
+    first). None when the text was never materialized (streaming extraction).
+    """
+    if metadata.get("extractedText") is not None:
+        return metadata["extractedText"]
+    pointer = metadata.get("extractedTextBlob")
+    if not pointer:
+        return None
+
+    data = _cache_get(pointer["sha256"], pointer["codec"])
+    if data is None:
+        data = download_bytes(pointer["path"])
+        text = decompress_text(data, pointer["codec"])
+        if text_digest(text) != pointer["sha256"]:
+            raise ValueError(f"Extracted text at {pointer['path']} does not match its recorded hash")
+        _cache_put(pointer["sha256"], pointer["codec"], data)
+        return text
+    return decompress_text(data, pointer["codec"])
@@ -1,14 +1,19 @@
+import os
 import re
-import ftfy
-import spacy
-import textstat
 import statistics
-from ollama import chat
+from app.config.model_registry import get_sentence_nlp
 
-nlp = spacy.load("en_core_web_sm")
+# ftfy, textstat and the LLM gateway are imported inside the functions that use them
+# so importing this module stays cheap for routes that never clean text
+
+# Modules are split into sentences in nlp.pipe batches; SPACY_N_PROCESS > 1 spreads that across processes
+SPACY_PIPE_BATCH_SIZE = int(os.environ.get("SPACY_PIPE_BATCH_SIZE", "32"))
+SPACY_N_PROCESS = int(os.environ.get("SPACY_N_PROCESS", "1"))
 
 # === Dynamic Threshold Calculator === #
 def get_dynamic_thresholds(text):
+    import textstat
+
     lines = [line.strip() for line in text.split("\n") if line.strip()]
     line_lengths = [len(line) for line in lines]
     avg_line_len = sum(line_lengths) / len(line_lengths) if line_lengths else 0
@@ -30,6 +35,8 @@ def get_dynamic_thresholds(text):
     return length_thresh, noise_ratio, min_readability
 
 def fix_text(text):
+    import ftfy
+
     text = ftfy.fix_text(text)
     text = re.sub(r'(\w+)-\n(\w+)', r'\1\2', text)
     text = re.sub(r'(?<!\n)\n(?!\n)', ' ', text)
@@ -38,13 +45,21 @@ def fix_text(text):
     return text.strip()
 
 def is_noisy(text, noise_ratio_thresh, readability_thresh):
+    import textstat
+
     lines = text.split("\n")
     short_lines = [line for line in lines if len(line.strip()) < 30]
     ratio = len(short_lines) / len(lines) if lines else 0
     readability = textstat.flesch_reading_ease(text)
     return ratio > noise_ratio_thresh or readability < readability_thresh
 
-def is_content_useful(text_chunk):
+# Paragraphs are classified USEFULNESS_BATCH_SIZE per prompt (indexed JSON verdicts), with up to
+# USEFULNESS_WORKERS prompts in flight; verdicts are memoized by paragraph hash
+USEFULNESS_BATCH_SIZE = int(os.environ.get("USEFULNESS_BATCH_SIZE", "8"))
+USEFULNESS_WORKERS = int(os.environ.get("USEFULNESS_WORKERS", "4"))
+
+def _classify_paragraph(text_chunk):
+    """One LLM call; True/False, or None if the call failed."""
     prompt = f"""
 Given the following text, determine whether it contains educational value (e.g., explanation, theory, exercise, concept).
 
@@ -58,34 +73,125 @@ Text:
 Answer:
 """
     try:
-        res = chat(model="llama3.2:latest", messages=[{"role": "user", "content": prompt}])
+        from app.services.llm_gateway import ollama_chat
+        res = ollama_chat(model="llama3.2:latest", messages=[{"role": "user", "content": prompt}])
         return "yes" in res["message"]["content"].lower()
-    except:
-        return True
+    except Exception:
+        return None
+
+def _as_verdict(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("yes", "no", "true", "false"):
+        return value.strip().lower() in ("yes", "true")
+    return None
+
+def _classify_paragraphs_batch(paragraphs):
+    """
+    One LLM call classifying every paragraph via indexed JSON output.
+    Returns a verdict (or None if that entry was missing) per paragraph, or None if the call failed.
+    """
+    from app.helpers.prompt_helper import number_items, parse_indexed_json
+    from app.services.llm_gateway import ollama_chat
 
-def preprocess_uploaded_text(raw_text):
-    """Fix, score, and intelligently clean text using adaptive thresholds + LLM if needed."""
-    text = fix_text(raw_text)
+    prompt = f"""
+For each numbered text below, determine whether it contains educational value (e.g., explanation, theory, exercise, concept).
 
-    # Dynamically calculate thresholds
-    LENGTH_THRESHOLD, NOISE_LINE_RATIO, MIN_READABILITY = get_dynamic_thresholds(text)
+Avoid keeping unrelated content like tables of contents, references, disclaimers, answer keys, page numbers.
 
-    if len(text) < LENGTH_THRESHOLD and not is_noisy(text, NOISE_LINE_RATIO, MIN_READABILITY):
-        return text
+Return JSON only, with exactly one entry per text:
+{{"verdicts": [{{"index": 0, "useful": "yes"}}, {{"index": 1, "useful": "no"}}]}}
 
-    print(f"[INFO] LLM filtering activated — len: {len(text)} | noise_ratio: {NOISE_LINE_RATIO} | readability: {MIN_READABILITY}")
-    doc = nlp(text)
-    useful_chunks = []
-    para = ""
+Texts:
+{number_items(paragraphs)}
+"""
+    try:
+        res = ollama_chat(model="llama3.2:latest", messages=[{"role": "user", "content": prompt}], format="json")
+        verdicts = parse_indexed_json(res["message"]["content"], "verdicts", "useful", len(paragraphs))
+    except Exception as e:
+        print("[WARN] Batched usefulness classification failed:", e)
+        return None
+    return [_as_verdict(verdict) for verdict in verdicts]
+
+def _classify_batch(paragraphs):
+    if len(paragraphs) == 1:
+        return [_classify_paragraph(paragraphs[0])]
+    verdicts = _classify_paragraphs_batch(paragraphs)
+    if verdicts is None:
+        return [None] * len(paragraphs)
+    # Entries the batched answer skipped get an individual call
+    return [verdict if verdict is not None else _classify_paragraph(text) for text, verdict in zip(paragraphs, verdicts)]
+
+def classify_paragraphs(paragraphs, batch_size=None, workers=None):
+    """
+    Usefulness verdict per paragraph (same order). If the LLM is unavailable the paragraph
+    is kept (True), and that fallback is not memoized.
+    """
+    from app.helpers.llm_memo import memoized
+    from app.services.llm_gateway import map_batches
+
+    batch_size = max(1, batch_size or USEFULNESS_BATCH_SIZE)
+    workers = workers or USEFULNESS_WORKERS
+    verdicts = memoized(
+        "content_useful", paragraphs,
+        lambda missing: map_batches(_classify_batch, missing, batch_size, workers)
+    )
+    return [verdict is not False for verdict in verdicts]
+
+def is_content_useful(text_chunk):
+    return classify_paragraphs([text_chunk], batch_size=1, workers=1)[0]
 
+def split_paragraphs(doc, min_chars=400):
+    """Group the sentences of a spaCy doc into paragraphs of just over `min_chars` characters."""
+    paragraphs = []
+    para = ""
     for sent in doc.sents:
         para += sent.text.strip() + " "
-        if len(para) > 400:
-            if is_content_useful(para.strip()):
-                useful_chunks.append(para.strip())
+        if len(para) > min_chars:
+            paragraphs.append(para.strip())
             para = ""
+    if para.strip():
+        paragraphs.append(para.strip())
+    return paragraphs
 
-    if para and is_content_useful(para.strip()):
-        useful_chunks.append(para.strip())
+def _needs_llm_filter(text):
+    LENGTH_THRESHOLD, NOISE_LINE_RATIO, MIN_READABILITY = get_dynamic_thresholds(text)
+    if len(text) < LENGTH_THRESHOLD and not is_noisy(text, NOISE_LINE_RATIO, MIN_READABILITY):
+        return False
+    print(f"[INFO] LLM filtering activated — len: {len(text)} | noise_ratio: {NOISE_LINE_RATIO} | readability: {MIN_READABILITY}")
+    return True
+
+def preprocess_uploaded_texts(raw_texts):
+    """
+    Batch form of preprocess_uploaded_text for all of a document's modules (same order):
+    one nlp.pipe pass splits every module that needs filtering into sentences, and one
+    filter pass classifies all of their paragraphs.
+    """
+    from app.helpers.content_filter import filter_paragraphs
+
+    texts = [fix_text(raw_text) for raw_text in raw_texts]
+    to_filter = [idx for idx, text in enumerate(texts) if _needs_llm_filter(text)]
+    if not to_filter:
+        return texts
+
+    docs = get_sentence_nlp().pipe(
+        (texts[idx] for idx in to_filter),
+        batch_size=SPACY_PIPE_BATCH_SIZE,
+        n_process=SPACY_N_PROCESS
+    )
+    module_paragraphs = [split_paragraphs(doc) for doc in docs]
+
+    # Local tiers decide clear cases; only ambiguous paragraphs are sent to the LLM
+    verdicts = filter_paragraphs([para for paragraphs in module_paragraphs for para in paragraphs])
+
+    cleaned = list(texts)
+    offset = 0
+    for idx, paragraphs in zip(to_filter, module_paragraphs):
+        module_verdicts = verdicts[offset:offset + len(paragraphs)]
+        offset += len(paragraphs)
+        cleaned[idx] = "\n\n".join(para for para, useful in zip(paragraphs, module_verdicts) if useful)
+    return cleaned
 
-    return "\n\n".join(useful_chunks)
+def preprocess_uploaded_text(raw_text):
+    """Fix, score, and intelligently clean text using adaptive thresholds + LLM if needed."""
+    return preprocess_uploaded_texts([raw_text])[0]
@@ -1,17 +1,26 @@
 import io
-import pdfplumber
-from docx import Document
 
 def extract_text_from_pdf(file_stream):
+    import pdfplumber
+    from app.helpers.parallel_extraction import should_extract_in_parallel, extract_pages_parallel
+
     try:
         with pdfplumber.open(file_stream) as pdf:
-            text = "\n".join(page.extract_text() or '' for page in pdf.pages)
-        return text.strip()
+            page_count = len(pdf.pages)
+            if not should_extract_in_parallel(page_count):
+                return "\n".join(page.extract_text() or '' for page in pdf.pages).strip()
+
+        # Large PDF: extract page ranges across a process pool
+        file_stream.seek(0)
+        pages = extract_pages_parallel(file_stream.read(), page_count, engine="pdfplumber")
+        return "\n".join(pages).strip()
     except Exception as e:
         print(" PDF parsing error:", str(e))
         return ""
 
 def extract_text_from_docx(file_stream):
+    from docx import Document
+
     try:
         doc = Document(file_stream)
         text = "\n".join([p.text for p in doc.paragraphs])
@@ -20,17 +29,25 @@ def extract_text_from_docx(file_stream):
         print("DOCX parsing error:", str(e))
         return ""
 
-def is_resume_parsable(file_stream, filename):
+def extract_text(file_stream, filename):
+    """
+    Extract text from a PDF/DOCX stream in a single pass.
+    Returns None for unsupported file types.
+    """
     extension = filename.lower().split('.')[-1]
-    
+
     file_stream.seek(0)  # Reset stream position before parsing
 
     if extension == 'pdf':
-        text = extract_text_from_pdf(file_stream)
+        return extract_text_from_pdf(file_stream)
     elif extension == 'docx':
-        text = extract_text_from_docx(file_stream)
-    else:
-        print("Unsupported file type")
-        return False
+        return extract_text_from_docx(file_stream)
+
+    print("Unsupported file type")
+    return None
 
+def is_text_parsable(text):
     return bool(text and len(text) > 50)  # optional length check
+
+def is_resume_parsable(file_stream, filename):
+    return is_text_parsable(extract_text(file_stream, filename))
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from app.services.audio_service import (
-    get_cached_modules,
+    get_cached_module,
     generate_ssml,
     synthesize_audio_and_marks,
     save_module_audio
@@ -29,11 +29,8 @@ def generate_module_audio():
         except ValueError:
             return jsonify({"error": "Invalid module number format"}), 400
 
-        modules = get_cached_modules(user_email, document_id) # Use user_email from token
-        if not modules:
-            return jsonify({"error": "No cached modules found"}), 404
-
-        selected = next((m for m in modules if m["module_number"] == module_number), None)
+        # Only this module's document is read, not the whole module list
+        selected = get_cached_module(user_email, document_id, module_number) # Use user_email from token
         if not selected:
             return jsonify({"error": f"Module {module_number} not found"}), 404
 
@@ -21,7 +21,7 @@
 from flask import Blueprint, request, jsonify
 from app.utils.jwt_handler import verify_token
 from app.services.index_service import get_resource_index
-from app.config.firebase import db  # ✅ FIX: import db
+from app.services.module_store import get_catalog
 
 index_bp = Blueprint("index", __name__)
 
@@ -32,7 +32,19 @@ def get_index_ofdoc(document_id):
     decoded = verify_token(token)
     user_email = decoded.get("email")
 
-    result, status_code = get_resource_index(document_id, user_email)
+    # Optional pagination: ?offset=0&limit=20 materializes and returns just that page
+    try:
+        offset = int(request.args.get("offset", 0))
+        limit = int(request.args["limit"]) if "limit" in request.args else None
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+    if offset < 0 or (limit is not None and limit <= 0):
+        return jsonify({"error": "offset must be >= 0 and limit > 0"}), 400
+
+    # ?view=summary leaves out module_content (names, previews and scores only)
+    summary_only = request.args.get("view") == "summary"
+
+    result, status_code = get_resource_index(document_id, user_email, offset=offset, limit=limit, summary_only=summary_only)
     return jsonify(result), status_code
 
 # New: list all cached modules for the current user (used by the dashboard)
@@ -47,22 +59,14 @@ def get_all_indexes():
     if not email:
         return jsonify({"error": "Invalid token"}), 401
 
-    # Under Indexes/{email}/ we keep a subcollection per document_id
-    root = db.collection("Indexes").document(email)
-
-    # List all subcollections (each subcollection ID is a document_id)
+    # Per-user catalog: one query instead of one read per document
     try:
-            subcols = list(root.collections())
+        catalog = get_catalog(email)
     except Exception as e:
         return jsonify({"error": f"Failed to list indexes: {e}"}), 500
 
     modules_flat = []
-    for sub in subcols:
-        document_id = sub.id
-        mdoc = sub.document("modules").get()
-        if not mdoc.exists:
-            continue
-        modules = mdoc.to_dict().get("modules", [])
+    for document_id, modules in catalog.items():
         for m in modules:
             modules_flat.append({
                 "document_id": document_id,
@@ -0,0 +1,63 @@
+from flask import Blueprint, jsonify
+from app.config.model_registry import get_registry_report
+from app.config.startup import get_startup_report
+from app.services.dedup_service import get_dedup_stats
+from app.helpers.embedding_cache import get_embedding_cache_stats
+from app.services.answer_cache import get_answer_cache_stats
+from app.services.llm_gateway import get_llm_gateway_stats
+from app.helpers.llm_memo import get_llm_memo_stats
+from app.helpers.content_filter import get_content_filter_stats
+from app.helpers.read_cache import get_read_cache_stats
+from app.services.qa_history import get_qa_history_stats
+
+metrics_bp = Blueprint("metrics", __name__)
+
+# Load time and resident memory of the shared models / vector store
+@metrics_bp.route("/models", methods=["GET"])
+def get_model_metrics():
+    return jsonify(get_registry_report()), 200
+
+# Per-module import time and warm-up timings for this process
+@metrics_bp.route("/startup", methods=["GET"])
+def get_startup_metrics():
+    return jsonify(get_startup_report()), 200
+
+# Content-hash deduplication hit rate (uploads and module lists)
+@metrics_bp.route("/dedup", methods=["GET"])
+def get_dedup_metrics():
+    return jsonify(get_dedup_stats()), 200
+
+# On-disk embedding cache hit/miss counts and size
+@metrics_bp.route("/embedding-cache", methods=["GET"])
+def get_embedding_cache_metrics():
+    return jsonify(get_embedding_cache_stats()), 200
+
+# /qa/ask-question answer cache (exact + semantic tiers)
+@metrics_bp.route("/answer-cache", methods=["GET"])
+def get_answer_cache_metrics():
+    return jsonify(get_answer_cache_stats()), 200
+
+# LLM gateway: per-backend calls, retries, rejections, latency and circuit state
+@metrics_bp.route("/llm", methods=["GET"])
+def get_llm_metrics():
+    return jsonify(get_llm_gateway_stats()), 200
+
+# Memoized LLM outputs (module titles, ...) hit rate per kind
+@metrics_bp.route("/llm-memo", methods=["GET"])
+def get_llm_memo_metrics():
+    return jsonify(get_llm_memo_stats()), 200
+
+# Tiered content filter: paragraphs kept/dropped locally vs escalated to the LLM
+@metrics_bp.route("/content-filter", methods=["GET"])
+def get_content_filter_metrics():
+    return jsonify(get_content_filter_stats()), 200
+
+# Read-through cache of Firestore module summaries, modules and notes
+@metrics_bp.route("/read-cache", methods=["GET"])
+def get_read_cache_metrics():
+    return jsonify(get_read_cache_stats()), 200
+
+# Background Q&A history logging: queued, written (batched), dropped and pending entries
+@metrics_bp.route("/qa-history", methods=["GET"])
+def get_qa_history_metrics():
+    return jsonify(get_qa_history_stats()), 200
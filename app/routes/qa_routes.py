@@ -1,5 +1,7 @@
-from flask import Blueprint, jsonify
-from app.services.qa_service import handle_question
+from flask import Blueprint, request, jsonify
+from app.services.qa_service import handle_question, handle_question_stream
+from app.services.qa_history import get_user_qna_history
+from app.utils.jwt_handler import verify_token
 
 qa_bp = Blueprint('qa', __name__)
 
@@ -8,8 +10,32 @@ qa_bp = Blueprint('qa', __name__)
 def ask_question():
     return handle_question()
 
+# POST /qa/ask-question/stream — same body as ask-question, answered over server-sent events
+@qa_bp.route('/ask-question/stream', methods=['POST'])
+def ask_question_stream():
+    return handle_question_stream()
+
 @qa_bp.route('/history/<user_email>', methods=['GET'])
 def get_qna_history(user_email):
-    from app.services.qa_service import get_user_qna_history
-    history = get_user_qna_history(user_email)
-    return jsonify({"qna_history": history}), 200
+    token = request.headers.get("Authorization", "").replace("Bearer ", "")
+    decoded = verify_token(token)
+    if not decoded or decoded.get("email") != user_email:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    # Optional pagination (?limit=20&cursor=<nextCursor>) and document filter
+    # (?documentId=a&documentId=b or ?documentId=a,b)
+    try:
+        limit = int(request.args["limit"]) if "limit" in request.args else None
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit is not None and limit <= 0:
+        return jsonify({"error": "limit must be > 0"}), 400
+    document_ids = [
+        document_id for value in request.args.getlist("documentId")
+        for document_id in value.split(",") if document_id
+    ]
+
+    result, status_code = get_user_qna_history(
+        user_email, limit=limit, cursor=request.args.get("cursor"), document_ids=document_ids
+    )
+    return jsonify(result), status_code
@@ -1,12 +1,13 @@
 from flask import Blueprint, request, jsonify
 from app.services.upload_service import (
     upload_document_to_firestore_storage,
-    client,
+    queue_document_upload,
     add_note,
     get_notes
 )
+from app.services.document_catalog import list_user_documents
 from app.utils.jwt_handler import verify_token
-from app.config.firebase import db # Import db
+from app.config.model_registry import get_collection
 
 upload_bp = Blueprint("upload", __name__)
 
@@ -23,20 +24,41 @@ def upload():
     uploaded_file = request.files.get("file")
     document_name = request.form.get("documentName")
 
-    # 3. Delegate to the service layer
-    result, status_code = upload_document_to_firestore_storage(
-        token,
-        uploaded_file,
-        document_name
-    )
+    # 3. Delegate to the service layer: queue by default (202 + job id),
+    #    or process inline with ?sync=true
+    if request.args.get("sync", "").lower() in ("1", "true", "yes"):
+        result, status_code = upload_document_to_firestore_storage(
+            token,
+            uploaded_file,
+            document_name
+        )
+    else:
+        result, status_code = queue_document_upload(
+            token,
+            uploaded_file,
+            document_name
+        )
 
     # 4. Return JSON + HTTP status
     return jsonify(result), status_code
 
+@upload_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_upload_job(job_id):
+    from app.services.ingest_job_service import get_job, get_job_owner
+
+    user_email = get_user_email_from_request()
+    owner = get_job_owner(job_id)
+    if owner is None:
+        return jsonify({"error": "Job not found"}), 404
+    if owner != user_email:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    return jsonify(get_job(job_id)), 200
+
 @upload_bp.route("/index/<document_id>", methods=["GET"])
 def get_resource_index(document_id):
     # returns count of modules
-    collection = client.get_collection(name="llm_tutor_docs")
+    collection = get_collection()
     results = collection.get(where={"document_id": document_id})
     modules = []
     for doc, metadata in zip(results["documents"], results["metadatas"]):
@@ -53,7 +75,7 @@ def get_resource_index(document_id):
 
 @upload_bp.route("/module/<document_id>/<int:module_number>", methods=["GET"])
 def get_module_text(document_id, module_number):
-    collection = client.get_collection(name="llm_tutor_docs")
+    collection = get_collection()
     result = collection.get(where={"document_id": document_id}, limit=1,
                             where_document={"$contains": f"{module_number}"})
 
@@ -84,8 +106,19 @@ def post_note(document_id, chapter):
 @upload_bp.route("/notes/<document_id>/<int:chapter>", methods=["GET"])
 def get_all_notes(document_id, chapter):
     user_email = get_user_email_from_request()
-    notes = get_notes(document_id, chapter, user_email)
-    return jsonify({"notes": notes})
+
+    # Optional pagination: ?limit=50&cursor=<nextCursor of the previous page>
+    try:
+        limit = int(request.args["limit"]) if "limit" in request.args else None
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit is not None and limit <= 0:
+        return jsonify({"error": "limit must be > 0"}), 400
+
+    page = get_notes(document_id, chapter, user_email, limit=limit, cursor=request.args.get("cursor"))
+    if page is None:
+        return jsonify({"error": "Unknown cursor"}), 400
+    return jsonify(page)
 
 @upload_bp.route("/search", methods=["GET"])
 def search_documents():
@@ -114,22 +147,14 @@ def get_user_documents(user_email):
     if not decoded or decoded.get("email") != user_email:
         return jsonify({"error": "Unauthorized"}), 401
 
-    # 2. Fetch documents from Firestore
-    docs_ref = db.collection("documents").document(user_email)
-    
-    # Get all subcollections (document names) under the user's document
-    document_names_stream = docs_ref.collections()
-    
-    documents = []
-    for doc_name_collection in document_names_stream:
-        # For each document name, get the actual document info (assuming it's under a doc_id)
-        for doc_id_doc in doc_name_collection.stream():
-            doc_data = doc_id_doc.to_dict()
-            documents.append({
-                "documentId": doc_data.get("documentId"),
-                "documentName": doc_data.get("documentName"),
-                "uploadedAt": doc_data.get("uploadedAt").isoformat() if doc_data.get("uploadedAt") else None,
-                "url": doc_data.get("url")
-            })
-    
-    return jsonify({"documents": documents}), 200
+    # 2. Optional pagination: ?limit=20&cursor=<nextCursor of the previous page>
+    try:
+        limit = int(request.args["limit"]) if "limit" in request.args else None
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit is not None and limit <= 0:
+        return jsonify({"error": "limit must be > 0"}), 400
+
+    # 3. One ordered query over the user's document catalog (no extracted text is read)
+    result, status_code = list_user_documents(user_email, limit=limit, cursor=request.args.get("cursor"))
+    return jsonify(result), status_code
@@ -0,0 +1,114 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+
+# In-process answer cache for /qa/ask-question, keyed by (document_id, emotion, normalized question).
+# A semantic tier also serves a cached answer when a new question's embedding is within
+# ANSWER_CACHE_MAX_DISTANCE (cosine distance) of a cached question for the same document and emotion.
+# Entries remember the document's index generation (rag_service.get_index_generation) and are
+# only served while it is unchanged: a re-index in another process invalidates them too.
+
+ANSWER_CACHE_TTL_SECONDS = int(os.environ.get("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_DISTANCE = float(os.environ.get("ANSWER_CACHE_MAX_DISTANCE", "0.08"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "2000"))
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # (document_id, emotion, normalized) -> entry, oldest first
+_stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "invalidations": 0}
+
+
+def normalize_question(question):
+    question = re.sub(r"[^\w\s]", " ", question.lower())
+    return re.sub(r"\s+", " ", question).strip()
+
+
+def _cosine_distances(query, candidates):
+    """Cosine distance between `query` and each row of `candidates`, in one vectorized pass."""
+    import numpy as np
+
+    query = np.asarray(query, dtype=np.float32)
+    matrix = np.asarray(candidates, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    similarities = np.divide(matrix @ query, norms, out=np.zeros(len(matrix), dtype=np.float32), where=norms > 0)
+    return 1.0 - similarities
+
+
+def _purge_expired(now):
+    for key in [key for key, entry in _entries.items() if entry["expires_at"] <= now]:
+        del _entries[key]
+
+
+def _drop_stale(document_id, generation):
+    keys = [key for key, entry in _entries.items() if key[0] == document_id and entry["generation"] != generation]
+    for key in keys:
+        del _entries[key]
+    _stats["invalidations"] += len(keys)
+
+
+def lookup(document_id, emotion, question, embedding=None, generation=None):
+    """
+    Returns (answer_data, tier) where tier is "exact" or "semantic", or (None, None) on a miss.
+    `generation` is the document's current index generation; older entries are dropped.
+    """
+    key = (document_id, emotion, normalize_question(question))
+    now = time.time()
+
+    with _lock:
+        _drop_stale(document_id, generation)
+        entry = _entries.get(key)
+        if entry and entry["expires_at"] > now:
+            _entries.move_to_end(key)
+            _stats["exact_hits"] += 1
+            return entry["answer"], "exact"
+
+        if embedding is not None and ANSWER_CACHE_MAX_DISTANCE > 0:
+            _purge_expired(now)
+            candidates = [
+                (candidate_key, candidate["embedding"]) for candidate_key, candidate in _entries.items()
+                if candidate_key[:2] == key[:2] and candidate["embedding"] is not None
+            ]
+            if candidates:
+                distances = _cosine_distances(embedding, [vector for _, vector in candidates])
+                best = int(distances.argmin())
+                if distances[best] <= ANSWER_CACHE_MAX_DISTANCE:
+                    best_key = candidates[best][0]
+                    _entries.move_to_end(best_key)
+                    _stats["semantic_hits"] += 1
+                    return _entries[best_key]["answer"], "semantic"
+
+        _stats["misses"] += 1
+        return None, None
+
+
+def store(document_id, emotion, question, answer, embedding=None, generation=None):
+    key = (document_id, emotion, normalize_question(question))
+    with _lock:
+        _entries[key] = {
+            "answer": answer,
+            "embedding": embedding,
+            "generation": generation,
+            "expires_at": time.time() + ANSWER_CACHE_TTL_SECONDS,
+        }
+        _entries.move_to_end(key)
+        while len(_entries) > ANSWER_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def invalidate_document(document_id):
+    """Drop every cached answer for `document_id` (called when it is re-indexed)."""
+    with _lock:
+        keys = [key for key in _entries if key[0] == document_id]
+        for key in keys:
+            del _entries[key]
+        _stats["invalidations"] += len(keys)
+
+
+def get_answer_cache_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_entries)
+    lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+    stats["hit_rate"] = round((stats["exact_hits"] + stats["semantic_hits"]) / lookups, 4) if lookups else 0.0
+    return stats
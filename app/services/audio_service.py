@@ -2,14 +2,9 @@ import os
 import json
 import re
 import html
-import boto3
-from firebase_admin import firestore
-from google.cloud import storage
-from google.oauth2 import service_account
-from app.helpers.polly_helper import synthesize_speech
-# Initialize Firebase and Polly
-db = firestore.client()
-polly = boto3.client("polly",region_name="us-east-1")
+from app.config.firebase import db
+from app.helpers.polly_helper import get_polly_client
+from app.services.module_store import get_all_modules, get_module
 
 
 # Ensure output folder exists
@@ -20,16 +15,20 @@ EMPHASIS_KEYWORDS = {"important", "critical", "alert", "note", "warning"}
 
 def get_cached_modules(email, document_id):
     """
-    Retrieves cached module list from Firestore.
-    Path: Indexes/{email}/{document_id}/modules
+    Retrieves the cached module list from Firestore (see module_store for the layout).
     """
     print(f"Fetching cached modules for {email} in document {document_id}")
-    doc_ref = db.collection("Indexes").document(email).collection(document_id).document("modules")
-    doc = doc_ref.get()
-    if not doc.exists:
+    modules = get_all_modules(email, document_id)
+    if modules is None:
         return None
-    print(f"Found {len(doc.to_dict().get('modules', []))} modules")
-    return doc.to_dict().get("modules", [])
+    print(f"Found {len(modules)} modules")
+    return modules
+
+def get_cached_module(email, document_id, module_number):
+    """
+    Retrieves a single cached module (content included) without reading the others.
+    """
+    return get_module(email, document_id, module_number)
 
 def generate_ssml(text, chunk_id=0):
     ssml = '<speak>'
@@ -72,6 +71,8 @@ def synthesize_audio_and_marks(ssml, module_number):
     audio_path = f"output/audio_module{module_number}.mp3"
     marks_path = f"output/marks_module{module_number}.json"
 
+    polly = get_polly_client()
+
     # Generate audio
     audio_res = polly.synthesize_speech(
         Text=ssml,
@@ -113,6 +114,9 @@ def save_module_audio(email, document_id, module_number, ssml, audio_path, speec
     Firestore path: SSML/{email}/{document_id}/modules/module{n}
     Storage path: audio/{email}/{document_id}/module{n}.mp3
     """
+    from google.cloud import storage
+    from google.oauth2 import service_account
+
     print(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../firebase_token.json")))
     #  Load service account credentials
     credentials = service_account.Credentials.from_service_account_file(
@@ -0,0 +1,132 @@
+import time
+import hashlib
+import threading
+from app.config.firebase import db
+from app.config.model_registry import get_collection
+from app.helpers.chroma_helper import INDEX_BATCH_SIZE
+from app.helpers.text_blob_store import load_extracted_text
+
+# Content-hash deduplication: identical uploads reuse the chunks, embeddings,
+# cleaned modules and titles already computed for the first copy.
+#
+# Firestore: contentHashes/{sha256} -> {documentId, email, documentName, url, storagePath,
+#                                       chunkCount, modulesIndex?: {email, documentId}, hits}
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "module_hits": 0, "module_misses": 0}
+
+
+def content_hash(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def _record(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def find_indexed_content(digest: str):
+    """Returns the contentHashes record of an already-indexed upload with these bytes, or None."""
+    from firebase_admin import firestore
+
+    ref = db.collection("contentHashes").document(digest)
+    snapshot = ref.get()
+    if not snapshot.exists:
+        _record("misses")
+        return None
+
+    _record("hits")
+    ref.update({"hits": firestore.Increment(1)})
+    return snapshot.to_dict()
+
+
+def register_indexed_content(digest, email, document_name, document_id, url, storage_path, chunk_count):
+    """Record the first fully indexed copy of these bytes; later copies link to it."""
+    from google.api_core.exceptions import AlreadyExists
+
+    ref = db.collection("contentHashes").document(digest)
+    try:
+        ref.create({
+            "documentId":   document_id,
+            "email":        email,
+            "documentName": document_name,
+            "url":          url,
+            "storagePath":  storage_path,
+            "chunkCount":   chunk_count,
+            "hits":         0
+        })
+    except AlreadyExists:
+        pass  # already registered by an earlier (or concurrent) upload
+
+
+def load_duplicate_text(record):
+    """Extracted text of the canonical copy (None if it was extracted in streaming mode)."""
+    path = f"documents/{record['email']}/{record['documentName']}/{record['documentId']}"
+    snapshot = db.document(path).get()
+    if not snapshot.exists:
+        return None
+    return load_extracted_text(snapshot.to_dict())
+
+
+def clone_document_chunks(source_document_id, document_id, document_name, user_email, digest):
+    """
+    Copy the canonical document's chunk texts and embeddings under the new document id,
+    without running the embedding model. Returns the number of chunks copied.
+    """
+    collection = get_collection()
+    indexed_at = time.time()
+    results = collection.get(
+        where={"document_id": source_document_id},
+        include=["documents", "metadatas", "embeddings"]
+    )
+    rows = sorted(
+        zip(results["documents"], results["metadatas"], list(results["embeddings"])),
+        key=lambda row: row[1]["module"]
+    )
+
+    for start in range(0, len(rows), INDEX_BATCH_SIZE):
+        batch = rows[start:start + INDEX_BATCH_SIZE]
+        collection.upsert(
+            ids=[f"{document_id}_{meta['module']}" for _, meta, _ in batch],
+            documents=[doc for doc, _, _ in batch],
+            metadatas=[
+                {"document_id": document_id, "module": meta["module"], "documentName": document_name,
+                 "email": user_email, "content_hash": digest, "indexed_at": indexed_at}
+                for _, meta, _ in batch
+            ],
+            embeddings=[list(embedding) for _, _, embedding in batch]
+        )
+    return len(rows)
+
+
+def register_modules(digest, email, document_id):
+    """Point the content hash at a computed (cleaned + titled) module set."""
+    db.collection("contentHashes").document(digest).set({
+        "modulesIndex": {"email": email, "documentId": document_id}
+    }, merge=True)
+
+
+def find_cached_modules(digest):
+    """Cleaned, titled modules already computed for identical content, or None."""
+    from app.services.module_store import get_all_modules
+
+    snapshot = db.collection("contentHashes").document(digest).get()
+    record = snapshot.to_dict() if snapshot.exists else {}
+    source = record.get("modulesIndex")
+    modules = get_all_modules(source["email"], source["documentId"]) if source else None
+    if not modules:
+        _record("module_misses")
+        return None
+
+    _record("module_hits")
+    return modules
+
+
+def get_dedup_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    module_lookups = stats["module_hits"] + stats["module_misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["module_hit_rate"] = round(stats["module_hits"] / module_lookups, 4) if module_lookups else 0.0
+    return stats
@@ -0,0 +1,86 @@
+from app.config.firebase import db
+
+# Per-user listing of uploads, so GET /upload/documents never touches the metadata docs
+# (which carry the extracted text):
+#   userDocuments/{email}/items/{document_id}  - {documentId, documentName, uploadedAt, url}
+#   userDocuments/{email}                      - {complete: True} once every upload has an entry
+# Entries are written together with the metadata (upload_service.store_document); users who
+# uploaded before the catalog existed get theirs built on first listing (rebuild_catalog).
+
+CATALOG_FIELDS = ("documentId", "documentName", "uploadedAt", "url")
+
+# Firestore caps a write batch at 500 operations
+_MAX_BATCH_WRITES = 500
+
+
+def catalog_collection(email):
+    return db.collection("userDocuments").document(email).collection("items")
+
+
+def catalog_entry(metadata, create_time=None):
+    """
+    The catalog fields of `metadata`. Listing orders by uploadedAt, which drops entries without
+    it, so metadata that lacks one falls back to `create_time` (when the metadata doc was created).
+    """
+    entry = {field: metadata.get(field) for field in CATALOG_FIELDS}
+    if entry["uploadedAt"] is None:
+        entry["uploadedAt"] = create_time
+    return entry
+
+
+def rebuild_catalog(email):
+    """
+    Build the catalog from documents/{email}/{documentName}/{docId}, reading only the
+    catalog fields (projection: extractedText stays in Firestore).
+    """
+    entries = []
+    for name_collection in db.collection("documents").document(email).collections():
+        for snapshot in name_collection.select(CATALOG_FIELDS).stream():
+            entry = catalog_entry(snapshot.to_dict(), snapshot.create_time)
+            if entry["documentId"]:
+                entries.append(entry)
+
+    for start in range(0, len(entries), _MAX_BATCH_WRITES):
+        batch = db.batch()
+        for entry in entries[start:start + _MAX_BATCH_WRITES]:
+            batch.set(catalog_collection(email).document(entry["documentId"]), entry)
+        batch.commit()
+    db.collection("userDocuments").document(email).set({"complete": True}, merge=True)
+    print(f"[DOCUMENT CATALOG] Built for {email}: {len(entries)} documents")
+
+
+def _serialize(entry):
+    uploaded_at = entry.get("uploadedAt")
+    return {
+        "documentId": entry.get("documentId"),
+        "documentName": entry.get("documentName"),
+        "uploadedAt": uploaded_at.isoformat() if uploaded_at else None,
+        "url": entry.get("url")
+    }
+
+
+def list_user_documents(email, limit=None, cursor=None):
+    """
+    The user's uploads, newest first, from one ordered query over the catalog. With `limit`,
+    only one page is returned and `nextCursor` (the last documentId of the page, None at the
+    end) is passed back as `cursor` for the next one.
+    Returns (payload, status).
+    """
+    parent = db.collection("userDocuments").document(email).get()
+    if not parent.exists or not parent.to_dict().get("complete"):
+        rebuild_catalog(email)
+
+    query = catalog_collection(email).order_by("uploadedAt", direction="DESCENDING")
+    if cursor:
+        last = catalog_collection(email).document(cursor).get()
+        if not last.exists:
+            return {"error": "Unknown cursor"}, 400
+        query = query.start_after(last)
+    if limit is not None:
+        query = query.limit(limit)
+
+    entries = [snapshot.to_dict() for snapshot in query.stream()]
+    payload = {"documents": [_serialize(entry) for entry in entries]}
+    if limit is not None:
+        payload["nextCursor"] = entries[-1]["documentId"] if len(entries) == limit else None
+    return payload, 200
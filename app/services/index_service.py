@@ -1,47 +1,68 @@
-from flask import jsonify
-import chromadb
-from chromadb.config import Settings
-from chromadb import PersistentClient
-from chromadb.utils import embedding_functions
-from app.services.llm_service import call_llama_for_module_name
-from app.config.firebase import db
-from app.helpers.similarity_calculation import get_similarity_and_confidence
-client = PersistentClient(path="chroma_storage")
-embedder = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
-collection = client.get_or_create_collection("llm_tutor_docs", embedding_function=embedder)
-from app.helpers.text_cleaner import preprocess_uploaded_text
-
-def get_resource_index(document_id, user_email):
-    #  1. Check Firestore for cached modules
-    doc_ref = db.collection("Indexes").document(user_email).collection(document_id).document("modules") 
-    cached_doc = doc_ref.get()
-
-    if cached_doc.exists and "modules" in cached_doc.to_dict():
-        print("[CACHE HIT] Returning precomputed modules")
-        cached_modules = cached_doc.to_dict()["modules"]
-        return {
-            "moduleCount": len(cached_modules),
-            "modules": sorted(cached_modules, key=lambda x: x["module_number"])
-        }, 200 # Return data and status code
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.services.llm_service import title_modules
+from app.config.model_registry import get_collection
+from app.helpers.similarity_calculation import get_similarity_and_confidence_batch
+from app.helpers.text_cleaner import preprocess_uploaded_texts
+from app.services.dedup_service import find_cached_modules, register_modules
+from app.services import module_store
 
-    # ⚙️ 2. If not cached, compute via Chroma and LLM
-    print("[CACHE MISS] Generating modules from Chroma and LLM")
-    # Use the globally defined 'collection'
-    results = collection.get(where={"document_id": document_id})
-    modules = []
+# Modules are materialized (titled, cleaned, scored) INDEX_PAGE_SIZE at a time, and each one is
+# cached in Firestore (module_store: module_{n} docs) as soon as its page is done; the summary
+# doc is written once every module is ready. With ?limit= only the requested page is computed
+# inline; INDEX_BACKGROUND_FILL then materializes the rest of the document in a background thread.
+INDEX_PAGE_SIZE = int(os.environ.get("INDEX_PAGE_SIZE", "20"))
+INDEX_BACKGROUND_FILL = os.environ.get("INDEX_BACKGROUND_FILL", "1").lower() in ("1", "true", "yes")
+
+_fill_lock = threading.Lock()
+_filling = set()  # (email, document_id) pairs with a background fill in flight
+_fill_executor = None
+
+
+def _page_response(modules, total, offset, limit, complete, summary_only=False):
+    if summary_only:
+        modules = [module_store.summarize(module) for module in modules]
+    response = {"moduleCount": total, "modules": modules, "complete": complete}
+    if limit is not None:
+        next_offset = offset + limit
+        response.update({
+            "offset": offset,
+            "limit": limit,
+            "nextOffset": next_offset if next_offset < total else None,
+        })
+    return response
+
+
+def _load_chunks(document_id):
+    """(module_number, chunk_text) rows of the document ordered by module, and its content hash."""
+    results = get_collection().get(where={"document_id": document_id})
+    rows = sorted(
+        ((metadata["module"], doc) for doc, metadata in zip(results["documents"], results["metadatas"])),
+        key=lambda row: row[0]
+    )
+    digest = results["metadatas"][0].get("content_hash") if results["metadatas"] else None
+    return rows, digest
 
-    for doc, metadata in zip(results["documents"], results["metadatas"]):
-        module_name = "Untitled Module" # Default title
-        try:
-            module_name = call_llama_for_module_name(doc[:50])
-        except Exception as e:
-            print(f"Error calling LLaMA for module title (Document ID: {document_id}, Module: {metadata['module']}): {e}")
-            # Continue with default title if LLM call fails
-            
-        cleaned_text = preprocess_uploaded_text(doc)
-        similarity, confidence = get_similarity_and_confidence(doc, cleaned_text)
+
+def _build_modules(rows):
+    """Title, clean and score a batch of (module_number, chunk_text) rows."""
+    texts = [doc for _, doc in rows]
+
+    # Title every module up front: memoized, with bounded parallel (optionally batched) LLM calls.
+    # Failed titles come back as "Untitled Module"
+    module_names = title_modules([doc[:50] for doc in texts])
+
+    # Clean every module in one pass (batched sentence splitting and usefulness filtering)
+    cleaned_texts = preprocess_uploaded_texts(texts)
+    scores = get_similarity_and_confidence_batch(zip(texts, cleaned_texts))
+
+    modules = []
+    for (module_number, doc), module_name, cleaned_text, (similarity, confidence) in zip(
+        rows, module_names, cleaned_texts, scores
+    ):
         module_info = {
-            "module_number": metadata["module"],
+            "module_number": module_number,
             "module_name": module_name,
             "module_content" : cleaned_text,
             "preview": doc[:100],
@@ -51,11 +72,109 @@ def get_resource_index(document_id, user_email):
             "cleaned_leangth" : len(cleaned_text)
         }
         modules.append(module_info)
+    return modules
+
+
+def _materialize(user_email, document_id, rows):
+    """
+    Modules for `rows` (same order): stored module_{n} docs are reused, the rest are
+    computed and written before returning.
+    """
+    if not rows:
+        return []
+    stored = {
+        module["module_number"]: module
+        for module in module_store.get_modules(user_email, document_id, [number for number, _ in rows])
+    }
+
+    missing = [row for row in rows if row[0] not in stored]
+    if missing:
+        built = _build_modules(missing)
+        module_store.save_modules(user_email, document_id, built)
+        stored.update({module["module_number"]: module for module in built})
+
+    return [stored[number] for number, _ in rows]
+
+
+def _finish(user_email, document_id, modules, digest):
+    # 💾 Summary last: it marks the document as fully indexed
+    module_store.save_summary(user_email, document_id, modules)
+    if digest:
+        register_modules(digest, user_email, document_id)
+
+
+def _materialize_all(user_email, document_id, rows, digest):
+    modules = []
+    for start in range(0, len(rows), INDEX_PAGE_SIZE):
+        modules.extend(_materialize(user_email, document_id, rows[start:start + INDEX_PAGE_SIZE]))
+    _finish(user_email, document_id, modules, digest)
+    return modules
+
+
+def _background_fill(user_email, document_id, rows, digest):
+    try:
+        _materialize_all(user_email, document_id, rows, digest)
+        print(f"[INDEX FILL] {document_id}: all {len(rows)} modules materialized")
+    except Exception as e:
+        print(f"[INDEX FILL] {document_id} failed: {e}")
+    finally:
+        with _fill_lock:
+            _filling.discard((user_email, document_id))
+
+
+def _start_background_fill(user_email, document_id, rows, digest):
+    global _fill_executor
+    with _fill_lock:
+        if (user_email, document_id) in _filling:
+            return
+        _filling.add((user_email, document_id))
+        if _fill_executor is None:
+            _fill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-fill")
+    _fill_executor.submit(_background_fill, user_email, document_id, rows, digest)
+
+
+def get_resource_index(document_id, user_email, offset=0, limit=None, summary_only=False):
+    """
+    Modules of a document. With `limit`, only modules [offset, offset + limit) are returned
+    (and materialized if needed); otherwise all of them. `summary_only` leaves out module_content.
+    Returns (payload, status).
+    """
+    def page_of(items):
+        return items if limit is None else items[offset:offset + limit]
+
+    #  1. Check Firestore for cached modules (summary first, full modules only if needed)
+    summary = module_store.get_summary(user_email, document_id)
+
+    if summary is not None:
+        print("[CACHE HIT] Returning precomputed modules")
+        page = page_of(summary)
+        if not summary_only:
+            page = module_store.get_modules(user_email, document_id, [m["module_number"] for m in page])
+        return _page_response(page, len(summary), offset, limit, complete=True), 200
+
+    # ⚙️ 2. If not cached, compute via Chroma and LLM
+    print("[CACHE MISS] Generating modules from Chroma and LLM")
+    rows, digest = _load_chunks(document_id)
+    if not rows:
+        # Still being ingested (or unknown): don't cache an empty module list
+        return _page_response([], 0, offset, limit, complete=False), 200
+
+    # Identical content already cleaned and titled (possibly for another user)? Link it
+    if digest:
+        reused = find_cached_modules(digest)
+        if reused is not None:
+            print("[DEDUP HIT] Reusing modules computed for identical content")
+            module_store.save_modules(user_email, document_id, reused)
+            module_store.save_summary(user_email, document_id, reused)
+            reused = sorted(reused, key=lambda x: x["module_number"])
+            return _page_response(page_of(reused), len(reused), offset, limit, complete=True, summary_only=summary_only), 200
 
-    # 💾 3. Store in Firestore
-    doc_ref.set({ "modules": modules })
+    if limit is None:
+        modules = _materialize_all(user_email, document_id, rows, digest)
+        return _page_response(modules, len(rows), offset, limit, complete=True, summary_only=summary_only), 200
 
-    return {
-        "moduleCount": len(modules),
-        "modules": sorted(modules, key=lambda x: x["module_number"])
-    }, 200 # Return data and status code
+    # 📄 3. Only the requested page inline; the rest in the background
+    page = _materialize(user_email, document_id, page_of(rows))
+    if INDEX_BACKGROUND_FILL:
+        _start_background_fill(user_email, document_id, rows, digest)
+    return _page_response(page, len(rows), offset, limit, complete=False, summary_only=summary_only), 200
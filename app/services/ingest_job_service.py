@@ -0,0 +1,365 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Background ingestion: uploads are spooled to disk and tracked in a local SQLite
+# queue so the HTTP worker can return immediately and jobs survive a restart.
+
+INGEST_JOB_DIR = os.environ.get("INGEST_JOB_DIR", "ingest_jobs")
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "2"))
+INGEST_MAX_PENDING = int(os.environ.get("INGEST_MAX_PENDING", "50"))
+# A running job belongs to the process holding its lease: a random per-process token plus an
+# expiry renewed every third of INGEST_JOB_LEASE_SECONDS while the process lives. Jobs whose
+# lease ran out (owner crashed, was killed or recycled) are re-queued. PIDs are not used:
+# they are reused across restarts (PID 1 in containers, recycled gunicorn workers).
+INGEST_JOB_LEASE_SECONDS = float(os.environ.get("INGEST_JOB_LEASE_SECONDS", "60"))
+
+# Pipeline stages, in order. A job records each one as it completes and
+# resumes from the first incomplete stage after a restart.
+STAGES = ("parsed", "uploaded", "embedded", "indexed")
+
+_DB_PATH = os.path.join(INGEST_JOB_DIR, "jobs.sqlite3")
+_SPOOL_DIR = os.path.join(INGEST_JOB_DIR, "spool")
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+_process_token = None
+_process_token_pid = None
+_lease_keeper_pid = None
+_lease_lock = threading.Lock()
+
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_pid = None
+
+
+def _init_schema(conn):
+    global _schema_pid
+    with _schema_lock:
+        if _schema_pid == os.getpid():
+            return
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id            TEXT PRIMARY KEY,
+                    email         TEXT NOT NULL,
+                    document_name TEXT NOT NULL,
+                    document_id   TEXT NOT NULL,
+                    filename      TEXT NOT NULL,
+                    content_type  TEXT,
+                    status        TEXT NOT NULL,
+                    stages        TEXT NOT NULL DEFAULT '{}',
+                    result        TEXT NOT NULL DEFAULT '{}',
+                    error         TEXT,
+                    owner_token   TEXT,
+                    lease_expires REAL,
+                    created_at    TEXT NOT NULL,
+                    updated_at    TEXT NOT NULL
+                )
+            """)
+        _schema_pid = os.getpid()
+
+
+def _connect():
+    """
+    This thread's connection (one per thread and process, reused across calls; the schema is
+    created once per process). Use as `with _connect() as conn:` for one transaction.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        os.makedirs(_SPOOL_DIR, exist_ok=True)
+        conn = sqlite3.connect(_DB_PATH, timeout=30)
+        conn.row_factory = sqlite3.Row
+        _init_schema(conn)
+        _local.conn, _local.pid = conn, os.getpid()
+    return conn
+
+
+def _now():
+    return datetime.datetime.utcnow().isoformat()
+
+
+def _spool_path(job_id, suffix):
+    return os.path.join(_SPOOL_DIR, f"{job_id}.{suffix}")
+
+
+def _get_executor():
+    """Bounded worker pool, recreated in forked children (threads don't survive fork)."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _get_process_token():
+    """Random token of this process (a fresh one in forked children)."""
+    global _process_token, _process_token_pid
+    with _lease_lock:
+        if _process_token_pid != os.getpid():
+            _process_token, _process_token_pid = uuid.uuid4().hex, os.getpid()
+        return _process_token
+
+
+def _keep_leases():
+    interval = INGEST_JOB_LEASE_SECONDS / 3
+    while True:
+        time.sleep(interval)
+        try:
+            with _connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET lease_expires = ? WHERE status = 'running' AND owner_token = ?",
+                    (time.time() + INGEST_JOB_LEASE_SECONDS, _get_process_token())
+                )
+            # Take over jobs of processes that died since start-up
+            for job_id in _requeue_expired():
+                _get_executor().submit(_run_job, job_id)
+        except Exception as e:
+            print("[INGEST] Lease renewal failed:", str(e))
+
+
+def _start_lease_keeper():
+    """One lease-renewing thread per process (threads don't survive fork)."""
+    global _lease_keeper_pid
+    with _lease_lock:
+        if _lease_keeper_pid == os.getpid():
+            return
+        _lease_keeper_pid = os.getpid()
+    threading.Thread(target=_keep_leases, name="ingest-lease", daemon=True).start()
+
+
+def _requeue_expired():
+    """Put running jobs whose lease expired back in the queue; returns their ids."""
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT id, owner_token FROM jobs WHERE status = 'running' AND lease_expires < ?",
+            (time.time(),)
+        ).fetchall()
+        requeued = []
+        for row in rows:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', owner_token = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND owner_token IS ?",
+                (_now(), row["id"], row["owner_token"])
+            )
+            if cursor.rowcount == 1:
+                requeued.append(row["id"])
+    if requeued:
+        print(f"[INGEST] Re-queued {len(requeued)} job(s) with an expired lease")
+    return requeued
+
+
+def _row_to_job(row):
+    stages = json.loads(row["stages"])
+    return {
+        "jobId":        row["id"],
+        "status":       row["status"],
+        "documentId":   row["document_id"],
+        "documentName": row["document_name"],
+        "filename":     row["filename"],
+        "stages":       {stage: stages.get(stage) for stage in STAGES},
+        "result":       json.loads(row["result"]),
+        "error":        row["error"],
+        "createdAt":    row["created_at"],
+        "updatedAt":    row["updated_at"],
+    }
+
+
+def count_pending_jobs():
+    """Queued jobs plus running jobs whose owner still holds the lease."""
+    with _connect() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_expires >= ?)",
+            (time.time(),)
+        ).fetchone()[0]
+
+
+def enqueue_ingest_job(email, document_name, filename, content_type, file_bytes):
+    """
+    Spool the upload to disk, record a queued job and hand it to the worker pool.
+    Returns: job dict (see get_job)
+    """
+    job_id = uuid.uuid4().hex
+    doc_id = str(uuid.uuid4())
+
+    with _connect() as conn:
+        with open(_spool_path(job_id, "bin"), "wb") as f:
+            f.write(file_bytes)
+        now = _now()
+        conn.execute(
+            "INSERT INTO jobs (id, email, document_name, document_id, filename, content_type, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?)",
+            (job_id, email, document_name, doc_id, filename, content_type, now, now)
+        )
+
+    _get_executor().submit(_run_job, job_id)
+    return get_job(job_id)
+
+
+def get_job(job_id):
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def get_job_owner(job_id):
+    with _connect() as conn:
+        row = conn.execute("SELECT email FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return row["email"] if row else None
+
+
+def resume_pending_jobs():
+    """
+    Re-submit queued jobs, and running jobs whose owner's lease has expired.
+    Safe to call from several processes: a job is only run by the worker that claims it.
+    """
+    _requeue_expired()
+    with _connect() as conn:
+        queued = [r["id"] for r in conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at")]
+
+    _start_lease_keeper()
+    for job_id in queued:
+        _get_executor().submit(_run_job, job_id)
+    if queued:
+        print(f"[INGEST] Resumed {len(queued)} pending job(s)")
+    return len(queued)
+
+
+def _claim(job_id):
+    _start_lease_keeper()
+    with _connect() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'running', owner_token = ?, lease_expires = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'queued'",
+            (_get_process_token(), time.time() + INGEST_JOB_LEASE_SECONDS, _now(), job_id)
+        )
+        if cursor.rowcount != 1:
+            return None
+        return conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+
+def _complete_stage(job_id, stage, elapsed_ms, **result):
+    with _connect() as conn:
+        row = conn.execute("SELECT stages, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        stages = json.loads(row["stages"])
+        merged = json.loads(row["result"])
+        stages[stage] = {"completedAt": _now(), "ms": elapsed_ms}
+        merged.update(result)
+        conn.execute(
+            "UPDATE jobs SET stages = ?, result = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(stages), json.dumps(merged), _now(), job_id)
+        )
+    return merged
+
+
+def _finish(job_id, status, error=None):
+    with _connect() as conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, error, _now(), job_id)
+        )
+    for suffix in ("bin", "txt"):
+        try:
+            os.remove(_spool_path(job_id, suffix))
+        except FileNotFoundError:
+            pass
+
+
+def _run_job(job_id):
+    # Imported here so this module stays light for the request path
+    from app.services.dedup_service import content_hash, find_indexed_content
+    from app.services.upload_service import (
+        parse_document,
+        store_document,
+        index_upload,
+        mark_document_indexed,
+    )
+
+    row = _claim(job_id)
+    if row is None:
+        return  # already claimed by another worker/process, or finished
+
+    email = row["email"]
+    document_name = row["document_name"]
+    doc_id = row["document_id"]
+    filename = row["filename"]
+    done = json.loads(row["stages"])
+    result = json.loads(row["result"])
+
+    try:
+        with open(_spool_path(job_id, "bin"), "rb") as f:
+            file_bytes = f.read()
+
+        # 1. parsed — extracted text is spooled so later stages survive a restart
+        #    (streaming-mode jobs keep no text and re-stream the spooled bytes)
+        if "parsed" in done:
+            extracted_text = None
+            if not result.get("streaming"):
+                with open(_spool_path(job_id, "txt"), encoding="utf-8") as f:
+                    extracted_text = f.read()
+        else:
+            started = time.perf_counter()
+            # Identical bytes already indexed? Reuse that copy instead of recomputing
+            digest = content_hash(file_bytes)
+            duplicate = find_indexed_content(digest)
+            parsable, extracted_text = parse_document(file_bytes, filename, duplicate)
+            if not parsable:
+                _finish(job_id, "failed", "Document is not parsable")
+                return
+            if extracted_text is None:
+                result = _complete_stage(job_id, "parsed", _elapsed_ms(started),
+                                         streaming=True, extractedTextStored=False,
+                                         contentHash=digest, duplicate=duplicate)
+            else:
+                with open(_spool_path(job_id, "txt"), "w", encoding="utf-8") as f:
+                    f.write(extracted_text)
+                result = _complete_stage(job_id, "parsed", _elapsed_ms(started),
+                                         textLength=len(extracted_text), extractedTextStored=True,
+                                         contentHash=digest, duplicate=duplicate)
+        digest, duplicate = result.get("contentHash"), result.get("duplicate")
+
+        # 2. uploaded — binary in Cloud Storage, metadata in Firestore
+        if "uploaded" not in done:
+            started = time.perf_counter()
+            public_url, storage_path = store_document(
+                email, document_name, doc_id, filename, row["content_type"], file_bytes, extracted_text,
+                digest=digest, duplicate=duplicate
+            )
+            result = _complete_stage(job_id, "uploaded", _elapsed_ms(started),
+                                     documentUrl=public_url, storagePath=storage_path)
+
+        # 3. embedded — chunks embedded and upserted into Chroma (idempotent ids)
+        if "embedded" not in done:
+            started = time.perf_counter()
+            chunk_count = index_upload(
+                doc_id, result.get("documentUrl"), document_name, email, extracted_text, file_bytes, filename,
+                digest=digest, duplicate=duplicate
+            )
+            result = _complete_stage(job_id, "embedded", _elapsed_ms(started), chunkCount=chunk_count)
+
+        # 4. indexed — document marked searchable in Firestore
+        if "indexed" not in done:
+            started = time.perf_counter()
+            mark_document_indexed(email, document_name, doc_id, result.get("chunkCount", 0),
+                                  digest, result.get("documentUrl"), result.get("storagePath"))
+            _complete_stage(job_id, "indexed", _elapsed_ms(started))
+
+        _finish(job_id, "succeeded")
+        print(f"[INGEST] Job {job_id} finished for document ID: {doc_id}")
+    except Exception as e:
+        print(f"[INGEST] Job {job_id} failed:", str(e))
+        _finish(job_id, "failed", str(e))
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
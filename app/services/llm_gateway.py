@@ -0,0 +1,329 @@
+import os
+import time
+import random
+import threading
+from dotenv import load_dotenv
+
+# Settings below may come from .env, and this module can be imported before llm_service
+load_dotenv()
+
+# Single entry point for every LLM call (Ollama + Gemini). Per backend it enforces a
+# concurrency cap, a per-attempt timeout and an overall deadline, retries with jittered
+# backoff, and a circuit breaker that fails fast while the upstream is unhealthy.
+# Only transient errors (timeouts, connection errors, 429, 5xx) are retried and counted by
+# the breaker; anything else (blocked prompt, bad request, missing key) is re-raised as is.
+# Callers catch LLMUnavailableError and apply their existing fallbacks.
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
+# Point the Gemini SDK at another endpoint (e.g. benchmarks/fake_llm_server.py)
+GEMINI_API_ENDPOINT = os.environ.get("GEMINI_API_ENDPOINT")
+GEMINI_MODEL_NAME = os.environ.get("GEMINI_MODEL_NAME", "gemini-2.5-flash")
+
+
+class LLMUnavailableError(Exception):
+    """The backend is over capacity, past its deadline, failing, or its circuit is open."""
+
+
+def _env_number(name, default, cast=float):
+    return cast(os.environ.get(name, default))
+
+
+_transport_errors = None
+
+
+def _get_transport_errors():
+    """Timeout/connection exception classes of the HTTP clients under the SDKs, when installed."""
+    global _transport_errors
+    if _transport_errors is None:
+        errors = [TimeoutError, ConnectionError]
+        try:
+            import httpx  # ollama
+            errors.append(httpx.TransportError)
+        except ImportError:
+            pass
+        try:
+            import requests  # Gemini REST transport
+            errors.extend([requests.exceptions.ConnectionError, requests.exceptions.Timeout])
+        except ImportError:
+            pass
+        _transport_errors = tuple(errors)
+    return _transport_errors
+
+
+def _is_retryable_status(status):
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def _is_transient_error(error):
+    """Timeouts, connection errors, 429 and 5xx: worth a retry, and a sign of an unhealthy upstream."""
+    if isinstance(error, _get_transport_errors()):
+        return True
+    # ollama.ResponseError.status_code, google.api_core exceptions' .code (HTTP status)
+    for attribute in ("status_code", "code"):
+        if _is_retryable_status(getattr(error, attribute, None)):
+            return True
+    # requests / httpx HTTP errors carry the response
+    return _is_retryable_status(getattr(getattr(error, "response", None), "status_code", None))
+
+
+class _Backend:
+    def __init__(self, name, max_concurrency, timeout, deadline, max_retries,
+                 breaker_threshold, breaker_cooldown):
+        self.name = name
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = None
+        # Thread running the single half-open probe call, None when no probe is in flight
+        self._probe_thread = None
+        self._stats = {
+            "calls": 0, "successes": 0, "failures": 0, "retries": 0,
+            "rejected_busy": 0, "rejected_open": 0, "permanent_errors": 0,
+            "latency_ms_total": 0.0, "latency_ms_max": 0.0,
+        }
+
+    # --- circuit breaker ---
+    def _check_breaker(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.breaker_cooldown:
+                self._stats["rejected_open"] += 1
+                raise LLMUnavailableError(f"{self.name} circuit open")
+            # Cool-down elapsed: half-open, admit one probe call and keep rejecting the
+            # rest until it succeeds (closes the circuit) or fails (re-opens it)
+            if self._probe_thread is not None and self._probe_thread != threading.get_ident():
+                self._stats["rejected_open"] += 1
+                raise LLMUnavailableError(f"{self.name} circuit half-open, probe in flight")
+            self._probe_thread = threading.get_ident()
+
+    def _end_probe(self):
+        # Caller holds self._lock
+        if self._probe_thread == threading.get_ident():
+            self._probe_thread = None
+            return True
+        return False
+
+    def _on_success(self, latency_ms):
+        with self._lock:
+            self._end_probe()
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._stats["successes"] += 1
+            self._stats["latency_ms_total"] += latency_ms
+            self._stats["latency_ms_max"] = max(self._stats["latency_ms_max"], latency_ms)
+
+    def _on_failure(self):
+        with self._lock:
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            if self._end_probe() or self._consecutive_failures >= self.breaker_threshold:
+                if self._opened_at is None:
+                    print(f"[LLM GATEWAY] {self.name} circuit opened after {self._consecutive_failures} failures")
+                self._opened_at = time.monotonic()
+
+    def _on_permanent_error(self):
+        # The upstream answered, so the breaker is left alone; a half-open probe just ends
+        with self._lock:
+            self._end_probe()
+            self._stats["permanent_errors"] += 1
+
+    def _count(self, counter):
+        with self._lock:
+            self._stats[counter] += 1
+
+    # --- calls ---
+    def acquire(self, deadline_at):
+        self._check_breaker()
+        if not self._slots.acquire(timeout=max(0.0, deadline_at - time.monotonic())):
+            with self._lock:
+                # A probe that never ran must not keep the circuit half-open forever
+                self._end_probe()
+                self._stats["rejected_busy"] += 1
+            raise LLMUnavailableError(f"{self.name} is at its concurrency limit")
+
+    def release(self):
+        self._slots.release()
+
+    def call(self, fn):
+        """Run `fn(timeout)` under this backend's limits. Returns its result or raises LLMUnavailableError."""
+        deadline_at = time.monotonic() + self.deadline
+        self._count("calls")
+        self.acquire(deadline_at)
+        try:
+            return self._call_with_retries(fn, deadline_at)
+        finally:
+            self.release()
+
+    def _call_with_retries(self, fn, deadline_at):
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                self._on_failure()
+                raise LLMUnavailableError(f"{self.name} deadline exceeded")
+
+            started = time.monotonic()
+            try:
+                result = fn(min(self.timeout, remaining))
+            except Exception as e:
+                if not _is_transient_error(e):
+                    self._on_permanent_error()
+                    raise
+                self._on_failure()
+                if attempt >= self.max_retries:
+                    raise LLMUnavailableError(f"{self.name} failed: {e}") from e
+                self._check_breaker()
+
+                # Exponential backoff with full jitter, never past the deadline
+                backoff = random.uniform(0, min(4.0, 0.25 * (2 ** attempt)))
+                time.sleep(min(backoff, max(0.0, deadline_at - time.monotonic())))
+                attempt += 1
+                self._count("retries")
+                continue
+
+            self._on_success((time.monotonic() - started) * 1000)
+            return result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["circuit_open"] = self._opened_at is not None
+            stats["consecutive_failures"] = self._consecutive_failures
+        stats["max_concurrency"] = self.max_concurrency
+        stats["latency_ms_avg"] = round(stats["latency_ms_total"] / stats["successes"], 1) if stats["successes"] else 0.0
+        stats["latency_ms_total"] = round(stats["latency_ms_total"], 1)
+        stats["latency_ms_max"] = round(stats["latency_ms_max"], 1)
+        return stats
+
+
+_ollama = _Backend(
+    "ollama",
+    max_concurrency=_env_number("OLLAMA_MAX_CONCURRENCY", "4", int),
+    timeout=_env_number("OLLAMA_TIMEOUT_SECONDS", "30"),
+    deadline=_env_number("OLLAMA_DEADLINE_SECONDS", "60"),
+    max_retries=_env_number("LLM_MAX_RETRIES", "2", int),
+    breaker_threshold=_env_number("LLM_BREAKER_THRESHOLD", "5", int),
+    breaker_cooldown=_env_number("LLM_BREAKER_COOLDOWN_SECONDS", "30"),
+)
+_gemini = _Backend(
+    "gemini",
+    max_concurrency=_env_number("GEMINI_MAX_CONCURRENCY", "8", int),
+    timeout=_env_number("GEMINI_TIMEOUT_SECONDS", "60"),
+    deadline=_env_number("GEMINI_DEADLINE_SECONDS", "90"),
+    max_retries=_env_number("LLM_MAX_RETRIES", "2", int),
+    breaker_threshold=_env_number("LLM_BREAKER_THRESHOLD", "5", int),
+    breaker_cooldown=_env_number("LLM_BREAKER_COOLDOWN_SECONDS", "30"),
+)
+
+# httpx timeouts are fixed per client and ollama.Client.chat takes none per request, so
+# attempts use the largest of these fixed timeouts that fits in the time they have left
+# (at most one client per bucket)
+_OLLAMA_TIMEOUT_BUCKETS = sorted(
+    {_ollama.timeout} | {b for b in (1, 2, 5, 10, 20, 30, 60, 120) if b < _ollama.timeout}
+)
+
+_clients_lock = threading.Lock()
+_ollama_clients = {}
+_gemini_model = None
+
+
+def _get_ollama_client(timeout):
+    bucket = max([b for b in _OLLAMA_TIMEOUT_BUCKETS if b <= timeout], default=_OLLAMA_TIMEOUT_BUCKETS[0])
+    with _clients_lock:
+        if bucket not in _ollama_clients:
+            import ollama
+            _ollama_clients[bucket] = ollama.Client(host=OLLAMA_HOST, timeout=bucket)
+        return _ollama_clients[bucket]
+
+
+def get_gemini_model():
+    """The Gemini model, configured on first use (the SDK is slow to import)."""
+    global _gemini_model
+    if _gemini_model is None:
+        with _clients_lock:
+            if _gemini_model is None:
+                import google.generativeai as genai
+
+                gemini_api_key = os.environ.get("GEMINI_API_KEY")
+                if not gemini_api_key:
+                    raise ValueError("GEMINI_API_KEY not found in environment variables.")
+
+                if GEMINI_API_ENDPOINT:
+                    genai.configure(api_key=gemini_api_key, transport="rest",
+                                    client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+                else:
+                    genai.configure(api_key=gemini_api_key)
+                _gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    return _gemini_model
+
+
+def ollama_chat(messages, model="llama3.2:latest", **kwargs):
+    """ollama.chat through the gateway. Returns the response; raises LLMUnavailableError."""
+    return _ollama.call(lambda timeout: _get_ollama_client(timeout).chat(model=model, messages=messages, **kwargs))
+
+
+def gemini_generate(prompt):
+    """Gemini generate_content through the gateway. Returns the response text; raises LLMUnavailableError."""
+    def attempt(timeout):
+        return get_gemini_model().generate_content(prompt, request_options={"timeout": timeout}).text
+
+    return _gemini.call(attempt)
+
+
+def gemini_stream(prompt):
+    """
+    Streaming generate_content through the gateway: yields text chunks.
+    Only opening the stream is retried; a failure mid-stream raises LLMUnavailableError.
+    """
+    backend = _gemini
+    deadline_at = time.monotonic() + backend.deadline
+    backend._count("calls")
+    backend.acquire(deadline_at)
+    try:
+        # Success/latency are recorded once the stream opens (first chunk received)
+        response = backend._call_with_retries(
+            lambda timeout: iter(get_gemini_model().generate_content(
+                prompt, stream=True, request_options={"timeout": timeout}
+            )),
+            deadline_at
+        )
+        try:
+            for chunk in response:
+                yield getattr(chunk, "text", "") or ""
+        except Exception as e:
+            if not _is_transient_error(e):
+                backend._on_permanent_error()
+                raise
+            backend._on_failure()
+            raise LLMUnavailableError(f"gemini stream failed: {e}") from e
+    finally:
+        backend.release()
+
+
+def map_batches(fn, items, batch_size, workers):
+    """
+    Apply `fn(batch) -> list` to consecutive batches of `items` with up to `workers` batches
+    in flight (the backend semaphores still cap concurrent calls). Returns the results in input order.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    batch_size = max(1, batch_size)
+    batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+    if workers <= 1 or len(batches) <= 1:
+        results = [fn(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+            results = list(pool.map(fn, batches))
+    return [value for batch_results in results for value in batch_results]
+
+
+def get_llm_gateway_stats():
+    return {"ollama": _ollama.stats(), "gemini": _gemini.stats()}
@@ -2,30 +2,46 @@ import os
 import json
 import re # Import the 're' module
 from dotenv import load_dotenv
-import ollama
-import google.generativeai as genai
-from app.helpers.prompt_helper import get_prompt
 
-# Load environment variables from .env
+# Load environment variables from .env (before the gateway reads its settings)
 load_dotenv()
 
+from app.helpers.prompt_helper import (
+    get_prompt,
+    get_stream_prompt,
+    number_items,
+    parse_indexed_json,
+    SUPPORTING_TEXTS_MARKER
+)
+from app.helpers.llm_memo import memoized
+from app.services.llm_gateway import (
+    get_gemini_model,
+    ollama_chat,
+    gemini_generate,
+    gemini_stream,
+    map_batches
+)
+
 # ----------------------------
 # Gemini 2.5 Pro Client Setup
 # ----------------------------
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in environment variables.")
-
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.5-flash')
+# The model is configured lazily by the LLM gateway (get_gemini_model), which also
+# applies concurrency limits, timeouts, retries and a circuit breaker to every call
 
 # ----------------------------
 # LLaMA 3.2 (Ollama) Function
 # ----------------------------
-def call_llama_for_module_name(text: str) -> str:
-    """
-    Generate a short descriptive title (3-6 words) for the given module content using LLaMA 3.2.
-    """
+# Titles are memoized by content hash; on a miss, up to MODULE_TITLE_WORKERS Ollama calls run
+# concurrently, and MODULE_TITLE_BATCH_SIZE > 1 titles that many modules per prompt (JSON output)
+MODULE_TITLE_WORKERS = int(os.environ.get("MODULE_TITLE_WORKERS", "4"))
+MODULE_TITLE_BATCH_SIZE = int(os.environ.get("MODULE_TITLE_BATCH_SIZE", "1"))
+UNTITLED_MODULE = "Untitled Module"
+
+def _clean_title(raw_title: str) -> str:
+    return raw_title.strip().strip('"').strip("'")
+
+def _generate_module_title(text: str):
+    """One Ollama call; returns the title, or None if the call failed."""
     prompt = f"""
 You are an expert course designer.
 
@@ -42,16 +58,69 @@ Content:
 Title:
     """
     try:
-        response = ollama.chat(
+        response = ollama_chat(
             model='llama3.2:latest',
             messages=[{"role": "user", "content": prompt}]
         )
         raw_title = response['message']['content']
-        clean_title = raw_title.strip().strip('"').strip("'")
-        return clean_title
+        return _clean_title(raw_title) or None
     except Exception as e:
         print("Error generating module title with LLaMA:", e)
-        return "Untitled Module"
+        return None
+
+def _generate_module_titles_batch(texts: list):
+    """
+    One Ollama call titling every text in `texts` via structured (JSON) output.
+    Returns a title (or None if that entry was missing/empty) per text, or None if the call failed.
+    """
+    prompt = f"""
+You are an expert course designer.
+
+For each numbered learning-module excerpt below, write a short, descriptive title (3 to 6 words max) that summarizes it.
+No extra slashes, quotes, or formatting inside the titles.
+
+Return JSON only, with exactly one entry per excerpt:
+{{"titles": [{{"index": 0, "title": "..."}}, {{"index": 1, "title": "..."}}]}}
+
+Excerpts:
+{number_items(texts)}
+    """
+    try:
+        response = ollama_chat(
+            model='llama3.2:latest',
+            messages=[{"role": "user", "content": prompt}],
+            format="json"
+        )
+        titles = parse_indexed_json(response['message']['content'], "titles", "title", len(texts))
+    except Exception as e:
+        print("Error generating batched module titles with LLaMA:", e)
+        return None
+    return [(_clean_title(str(title)) or None) if title is not None else None for title in titles]
+
+def _title_batch(texts: list) -> list:
+    if len(texts) == 1:
+        return [_generate_module_title(texts[0])]
+    titles = _generate_module_titles_batch(texts)
+    if titles is None:
+        return [None] * len(texts)
+    # Entries the batched answer skipped get an individual call
+    return [title if title is not None else _generate_module_title(text) for text, title in zip(texts, titles)]
+
+def title_modules(texts: list, batch_size: int = None, workers: int = None) -> list:
+    """
+    Titles for many module texts (same order). Failed titles fall back to "Untitled Module"
+    and are not memoized, so they are retried next time.
+    """
+    batch_size = max(1, batch_size or MODULE_TITLE_BATCH_SIZE)
+    workers = workers or MODULE_TITLE_WORKERS
+    titles = memoized("module_title", texts, lambda missing: map_batches(_title_batch, missing, batch_size, workers))
+    return [title or UNTITLED_MODULE for title in titles]
+
+def call_llama_for_module_name(text: str) -> str:
+    """
+    Generate a short descriptive title (3-6 words) for the given module content using LLaMA 3.2.
+    """
+    return title_modules([text], batch_size=1, workers=1)[0]
 
 # ----------------------------
 # Gemini 2.5 Pro Function
@@ -63,12 +132,18 @@ def generate_answer(question: str, module_content: str, emotion: str) -> dict:
     prompt = get_prompt(question, module_content, emotion)
     
     try:
-        resp = model.generate_content(prompt)
-        raw = resp.text.strip()
+        raw = gemini_generate(prompt).strip()
     except Exception as e:
         print("Gemini API request failed:", e)
-        return {"answer": "Error generating answer.", "supporting_texts": []}
+        return {"answer": "Error generating answer.", "supporting_texts": [], "error": True}
 
+    return parse_answer(raw)
+
+def parse_answer(raw: str) -> dict:
+    """
+    Parse Gemini's reply into {"answer", "supporting_texts"}, tolerating markdown fences,
+    plain text and JSON nested inside the answer field.
+    """
     answer_obj = {"answer": raw, "supporting_texts": []} # Default fallback
 
     cleaned_raw = raw.strip()
@@ -101,6 +176,57 @@ def generate_answer(question: str, module_content: str, emotion: str) -> dict:
 
     return answer_obj
 
+def stream_answer(question: str, module_content: str, emotion: str):
+    """
+    Streaming variant of generate_answer.
+
+    Yields ("token", text) for each piece of the answer as Gemini produces it, then a
+    single ("done", {"answer", "supporting_texts"}) — or ("error", message) on failure.
+    """
+    prompt = get_stream_prompt(question, module_content, emotion)
+
+    answer_parts = []
+    pending = ""       # text not yet forwarded (may hold the start of the marker)
+    tail = None        # everything after the marker
+    try:
+        for text in gemini_stream(prompt):
+            if tail is not None:
+                tail += text
+                continue
+
+            pending += text
+            marker_at = pending.find(SUPPORTING_TEXTS_MARKER)
+            if marker_at != -1:
+                emit, tail = pending[:marker_at], pending[marker_at + len(SUPPORTING_TEXTS_MARKER):]
+                pending = ""
+            else:
+                # Hold back enough characters to catch a marker split across chunks
+                split_at = max(0, len(pending) - (len(SUPPORTING_TEXTS_MARKER) - 1))
+                emit, pending = pending[:split_at], pending[split_at:]
+
+            if emit:
+                answer_parts.append(emit)
+                yield "token", emit
+    except Exception as e:
+        print("Gemini streaming request failed:", e)
+        yield "error", "Error generating answer."
+        return
+
+    if pending:
+        answer_parts.append(pending)
+        yield "token", pending
+
+    supporting_texts = []
+    if tail:
+        try:
+            parsed = json.loads(tail.strip())
+            if isinstance(parsed, list):
+                supporting_texts = [str(item) for item in parsed]
+        except json.JSONDecodeError:
+            supporting_texts = [tail.strip()]
+
+    yield "done", {"answer": "".join(answer_parts).strip(), "supporting_texts": supporting_texts}
+
 # ----------------------------
 # Example Usage
 # ----------------------------
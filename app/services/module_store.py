@@ -0,0 +1,181 @@
+from app.config.firebase import db
+from app.helpers import read_cache
+
+# Firestore layout of a document's computed modules:
+#   Indexes/{email}/{document_id}/module_{n}  - one full module (incl. module_content)
+#   Indexes/{email}/{document_id}/summary     - {moduleCount, modules: [SUMMARY_FIELDS of every module]}
+# The summary is only written once every module exists, so it doubles as the "complete" marker.
+#
+# Per-user catalog, so the dashboard lists every indexed document in one query:
+#   indexCatalog/{email}/documents/{document_id}  - {documentId, moduleCount, modules: [{module_number, module_name}]}
+#   indexCatalog/{email}                          - {complete: True} once the catalog covers every document
+# Entries are written together with each summary; users indexed before the catalog existed
+# get theirs built on first read (rebuild_catalog).
+# Older documents keep everything in Indexes/{email}/{document_id}/modules; the readers fall
+# back to it until scripts/migrate_module_storage.py has converted them.
+#
+# Summaries and full modules are read through app/helpers/read_cache.py, keyed
+# (email, document_id, "summary") and (email, document_id, "module", n); the writers below
+# invalidate what they change.
+
+SUMMARY_FIELDS = ("module_number", "module_name", "preview", "length", "cleaned_leangth", "similarity", "confidence")
+
+# Firestore caps a write batch at 500 operations
+_MAX_BATCH_WRITES = 500
+
+
+def index_collection(email, document_id):
+    return db.collection("Indexes").document(email).collection(document_id)
+
+
+def module_ref(email, document_id, module_number):
+    return index_collection(email, document_id).document(f"module_{module_number}")
+
+
+def summarize(module):
+    return {field: module.get(field) for field in SUMMARY_FIELDS}
+
+
+def _legacy_modules(email, document_id):
+    snapshot = index_collection(email, document_id).document("modules").get()
+    if not snapshot.exists:
+        return None
+    return snapshot.to_dict().get("modules")
+
+
+def save_modules(email, document_id, modules):
+    """Write (or overwrite) module_{n} docs, in as few batches as possible."""
+    for start in range(0, len(modules), _MAX_BATCH_WRITES):
+        batch = db.batch()
+        for module in modules[start:start + _MAX_BATCH_WRITES]:
+            batch.set(module_ref(email, document_id, module["module_number"]), module)
+        batch.commit()
+    read_cache.invalidate((email, document_id, "module"))
+
+
+def catalog_collection(email):
+    return db.collection("indexCatalog").document(email).collection("documents")
+
+
+def _catalog_entry(document_id, summaries):
+    return {
+        "documentId": document_id,
+        "moduleCount": len(summaries),
+        "modules": [{"module_number": m["module_number"], "module_name": m["module_name"]} for m in summaries]
+    }
+
+
+def save_summary(email, document_id, modules):
+    """Write the summary and the user's catalog entry for this document (one batch)."""
+    summaries = sorted((summarize(module) for module in modules), key=lambda m: m["module_number"])
+    batch = db.batch()
+    batch.set(index_collection(email, document_id).document("summary"), {
+        "moduleCount": len(summaries),
+        "modules": summaries
+    })
+    batch.set(catalog_collection(email).document(document_id), _catalog_entry(document_id, summaries))
+    batch.commit()
+    read_cache.invalidate((email, document_id, "summary"))
+
+
+def _load_summary(email, document_id):
+    snapshot = index_collection(email, document_id).document("summary").get()
+    if snapshot.exists:
+        return snapshot.to_dict().get("modules", [])
+
+    legacy = _legacy_modules(email, document_id)
+    if legacy is None:
+        return None
+    return sorted((summarize(module) for module in legacy), key=lambda m: m["module_number"])
+
+
+def get_summary(email, document_id):
+    """Summaries of every module (sorted by number), or None if the document is not fully indexed."""
+    return read_cache.read_through((email, document_id, "summary"), lambda: _load_summary(email, document_id))
+
+
+def get_modules(email, document_id, module_numbers):
+    """
+    Full modules for `module_numbers` (same order; numbers without a stored module are skipped):
+    cached ones from the read cache, the rest in one batched get.
+    """
+    found = {}
+    for number in module_numbers:
+        module = read_cache.get((email, document_id, "module", number))
+        if module is not None:
+            found[number] = module
+
+    missing = [number for number in module_numbers if number not in found]
+    if missing:
+        refs = [module_ref(email, document_id, number) for number in missing]
+        loaded = {snapshot.id: snapshot.to_dict() for snapshot in db.get_all(refs) if snapshot.exists}
+        if len(loaded) < len(refs):
+            legacy = _legacy_modules(email, document_id) or []
+            for module in legacy:
+                loaded.setdefault(f"module_{module['module_number']}", module)
+        for number, ref in zip(missing, refs):
+            if ref.id in loaded:
+                found[number] = loaded[ref.id]
+                read_cache.put((email, document_id, "module", number), loaded[ref.id])
+
+    return [found[number] for number in module_numbers if number in found]
+
+
+def get_all_modules(email, document_id):
+    """Every full module of a fully indexed document (sorted by number), or None."""
+    summary = get_summary(email, document_id)
+    if summary is None:
+        return None
+    return get_modules(email, document_id, [module["module_number"] for module in summary])
+
+
+def get_module(email, document_id, module_number):
+    """One full module, or None."""
+    modules = get_modules(email, document_id, [module_number])
+    return modules[0] if modules else None
+
+
+def rebuild_catalog(email):
+    """
+    Build the catalog from Indexes/{email}: list the document subcollections, then read every
+    summary (and legacy module list) with batched get_all calls instead of one get per document.
+    Returns {document_id: [{module_number, module_name}]}.
+    """
+    document_ids = [subcollection.id for subcollection in db.collection("Indexes").document(email).collections()]
+
+    summaries = {}
+    refs = {index_collection(email, document_id).document("summary").path: document_id for document_id in document_ids}
+    for snapshot in db.get_all([index_collection(email, d).document("summary") for d in document_ids]):
+        if snapshot.exists:
+            summaries[refs[snapshot.reference.path]] = snapshot.to_dict().get("modules", [])
+
+    legacy_ids = [document_id for document_id in document_ids if document_id not in summaries]
+    refs = {index_collection(email, document_id).document("modules").path: document_id for document_id in legacy_ids}
+    for snapshot in db.get_all([index_collection(email, d).document("modules") for d in legacy_ids]):
+        if snapshot.exists:
+            legacy = snapshot.to_dict().get("modules", [])
+            summaries[refs[snapshot.reference.path]] = sorted(
+                (summarize(module) for module in legacy), key=lambda m: m["module_number"]
+            )
+
+    entries = [(document_id, _catalog_entry(document_id, summaries[document_id])) for document_id in document_ids
+               if document_id in summaries]
+    for start in range(0, len(entries), _MAX_BATCH_WRITES - 1):
+        batch = db.batch()
+        for document_id, entry in entries[start:start + _MAX_BATCH_WRITES - 1]:
+            batch.set(catalog_collection(email).document(document_id), entry)
+        batch.commit()
+    db.collection("indexCatalog").document(email).set({"complete": True}, merge=True)
+
+    return {document_id: entry["modules"] for document_id, entry in entries}
+
+
+def get_catalog(email):
+    """
+    {document_id: [{module_number, module_name}]} for every fully indexed document of the user:
+    one query over the catalog, or a (batched) rebuild the first time.
+    """
+    parent = db.collection("indexCatalog").document(email).get()
+    if not parent.exists or not parent.to_dict().get("complete"):
+        return rebuild_catalog(email)
+    return {snapshot.id: snapshot.to_dict().get("modules", []) for snapshot in catalog_collection(email).stream()}
@@ -0,0 +1,179 @@
+import os
+import time
+import queue
+import atexit
+import datetime
+import threading
+from app.config.firebase import db
+
+# Q&A history: qna_history/{autoId} = {email, document_id, module_number, question, answer,
+# emotion, cache, timestamp}. Answers are logged off the request path: log_qna only enqueues,
+# and a background writer commits whatever has accumulated in batched writes of up to
+# QA_HISTORY_BATCH_SIZE every QA_HISTORY_FLUSH_SECONDS. Entries beyond QA_HISTORY_MAX_PENDING
+# are dropped (and counted) rather than slowing down answers. At exit the writer gets up to
+# QA_HISTORY_SHUTDOWN_SECONDS to drain the queue; whatever is left is dropped and logged.
+#
+# Listing (newest first) needs the composite indexes (email ASC, timestamp DESC) and
+# (email ASC, document_id ASC, timestamp DESC) on qna_history.
+
+QA_HISTORY_ENABLED = os.environ.get("QA_HISTORY_ENABLED", "1").lower() in ("1", "true", "yes")
+QA_HISTORY_BATCH_SIZE = min(int(os.environ.get("QA_HISTORY_BATCH_SIZE", "50")), 500)
+QA_HISTORY_FLUSH_SECONDS = float(os.environ.get("QA_HISTORY_FLUSH_SECONDS", "2"))
+QA_HISTORY_MAX_PENDING = int(os.environ.get("QA_HISTORY_MAX_PENDING", "10000"))
+QA_HISTORY_SHUTDOWN_SECONDS = float(os.environ.get("QA_HISTORY_SHUTDOWN_SECONDS", "10"))
+
+HISTORY_FIELDS = ("question", "answer", "document_id", "module_number", "emotion", "timestamp")
+# Firestore accepts at most 30 values in an "in" filter
+MAX_DOCUMENT_FILTERS = 30
+
+_queue = queue.Queue(maxsize=QA_HISTORY_MAX_PENDING)
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"queued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+
+
+def _count(counter, amount=1):
+    with _stats_lock:
+        _stats[counter] += amount
+
+
+def _write_batch(entries):
+    try:
+        batch = db.batch()
+        for entry in entries:
+            batch.set(db.collection("qna_history").document(), entry)
+        batch.commit()
+        _count("written", len(entries))
+        _count("batches")
+    except Exception as e:
+        _count("failed", len(entries))
+        print(f"[QA HISTORY] Failed to write {len(entries)} entries: {e}")
+
+
+def _drain(first):
+    """`first` plus whatever else is already queued, up to one batch."""
+    entries = [first]
+    while len(entries) < QA_HISTORY_BATCH_SIZE:
+        try:
+            entries.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return entries
+
+
+def _run_writer():
+    while True:
+        entry = _queue.get()
+        # Give concurrent answers a moment to join this batch
+        if QA_HISTORY_FLUSH_SECONDS > 0 and _queue.qsize() < QA_HISTORY_BATCH_SIZE - 1:
+            time.sleep(QA_HISTORY_FLUSH_SECONDS)
+        entries = _drain(entry)
+        _write_batch(entries)
+        for _ in entries:
+            _queue.task_done()
+
+
+def _ensure_writer():
+    """One writer thread per process (recreated in forked children: threads don't survive fork)."""
+    global _writer, _writer_pid
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = threading.Thread(target=_run_writer, name="qa-history", daemon=True)
+            _writer.start()
+            _writer_pid = os.getpid()
+
+
+def log_qna(email, document_id, question, answer, emotion=None, module_number=None, cache=None):
+    """Queue one answered question for the history; never blocks or raises."""
+    if not QA_HISTORY_ENABLED:
+        return
+    entry = {
+        "email": email,
+        "document_id": document_id,
+        "module_number": module_number,
+        "question": question,
+        "answer": answer,
+        "emotion": emotion,
+        "cache": cache,
+        "timestamp": datetime.datetime.utcnow()
+    }
+    _ensure_writer()
+    try:
+        _queue.put_nowait(entry)
+        _count("queued")
+    except queue.Full:
+        _count("dropped")
+
+
+def flush(timeout=None):
+    """
+    Wait until every queued entry is written, for at most `timeout` seconds (default
+    QA_HISTORY_SHUTDOWN_SECONDS; used at exit and by scripts). Returns how many were not,
+    which are counted as dropped: a slow or unreachable Firestore must not hang shutdown.
+    """
+    if _writer is None or _writer_pid != os.getpid():
+        return 0
+    timeout = QA_HISTORY_SHUTDOWN_SECONDS if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    unwritten = _queue.unfinished_tasks
+    if unwritten:
+        _count("dropped", unwritten)
+        print(f"[QA HISTORY] {unwritten} entries not written within {timeout}s, dropped")
+    return unwritten
+
+
+atexit.register(flush)
+
+
+def get_user_qna_history(user_email, limit=None, cursor=None, document_ids=None):
+    """
+    The user's Q&A history, newest first, reading only the listed fields. `document_ids`
+    restricts it to those documents. With `limit`, one page plus "nextCursor" (the last
+    entry's id) to pass back as `cursor`.
+    Returns (payload, status).
+    """
+    history = db.collection("qna_history")
+    query = history.where("email", "==", user_email)
+    if document_ids:
+        if len(document_ids) > MAX_DOCUMENT_FILTERS:
+            return {"error": f"At most {MAX_DOCUMENT_FILTERS} documentId filters"}, 400
+        query = query.where("document_id", "in", list(document_ids))
+    query = query.order_by("timestamp", direction="DESCENDING").select(HISTORY_FIELDS)
+
+    if cursor:
+        last = history.document(cursor).get()
+        if not last.exists or last.get("email") != user_email:
+            return {"error": "Unknown cursor"}, 400
+        query = query.start_after(last)
+    if limit is not None:
+        query = query.limit(limit)
+
+    snapshots = list(query.stream())
+    qna_history = []
+    for snapshot in snapshots:
+        qna_data = snapshot.to_dict()
+        qna_history.append({
+            "question": qna_data.get("question"),
+            "answer": qna_data.get("answer"),
+            "documentId": qna_data.get("document_id"),
+            "moduleNumber": qna_data.get("module_number"),
+            "emotion": qna_data.get("emotion"),
+            "timestamp": qna_data.get("timestamp").isoformat() if qna_data.get("timestamp") else None
+        })
+
+    payload = {"qna_history": qna_history}
+    if limit is not None:
+        payload["nextCursor"] = snapshots[-1].id if len(snapshots) == limit else None
+    return payload, 200
+
+
+def get_qa_history_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["pending"] = _queue.qsize()
+    return stats
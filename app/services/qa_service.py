@@ -42,12 +42,21 @@
 #     })
 
 # app/services/qa_service.py
-from flask import request, jsonify
+import json
+import time
+from flask import request, jsonify, Response, stream_with_context
 from app.utils.jwt_handler import verify_token
-from app.services.rag_service import retrieve_relevant_chunks
-from app.services.llm_service import generate_answer
+from app.services.rag_service import retrieve_relevant_chunks, get_index_generation
+from app.services.llm_service import generate_answer, stream_answer
+from app.services import answer_cache
+from app.helpers.chroma_helper import embed_texts
+from app.services.qa_history import log_qna
 
-def handle_question():
+def _read_question_request():
+    """
+    Parse and validate an ask-question request.
+    Returns: ((question, document_id, emotion, email), None) or (None, error_response)
+    """
     data = request.get_json() or {}
     question = data.get('question')
     document_id = data.get('documentId') or data.get('document_id')  # be liberal in what you accept
@@ -59,19 +68,47 @@ def handle_question():
     email = decoded.get("email")
 
     if not question:
-        return jsonify({"error": "Missing field: question"}), 400
+        return None, (jsonify({"error": "Missing field: question"}), 400)
     if not email:
-        return jsonify({"error": "Invalid or missing token"}), 401
+        return None, (jsonify({"error": "Invalid or missing token"}), 401)
     if not document_id:
-        return jsonify({"error": "No document is selected. Open a module first."}), 400
+        return None, (jsonify({"error": "No document is selected. Open a module first."}), 400)
 
-    # Retrieve relevant chunks via RAG
-    relevant_chunks = retrieve_relevant_chunks(question, document_id, top_k=5)
-    if not relevant_chunks:
-        return jsonify({"error": "No relevant content found"}), 404
+    return (question, document_id, emotion, email), None
 
-    combined_context = "\n\n".join([c["chunk"] for c in relevant_chunks])
-    answer_data = generate_answer(question, combined_context, emotion)
+def _module_number():
+    """Optional moduleNumber of the ask-question body, recorded with the history."""
+    data = request.get_json(silent=True) or {}
+    return data.get('moduleNumber') or data.get('module_number')
+
+def handle_question():
+    params, error = _read_question_request()
+    if error:
+        return error
+    question, document_id, emotion, email = params
+
+    # Embed once: used for the semantic answer cache and for retrieval
+    question_embedding = embed_texts([question])[0]
+
+    # Same (or near-identical) question about this document answered since it was last indexed?
+    generation = get_index_generation(document_id)
+    answer_data, cache_tier = answer_cache.lookup(document_id, emotion, question, question_embedding, generation)
+
+    if answer_data is None:
+        # Retrieve relevant chunks via RAG
+        relevant_chunks = retrieve_relevant_chunks(question, document_id, top_k=5, query_embedding=question_embedding)
+        if not relevant_chunks:
+            return jsonify({"error": "No relevant content found"}), 404
+
+        combined_context = "\n\n".join([c["chunk"] for c in relevant_chunks])
+        answer_data = generate_answer(question, combined_context, emotion)
+        if not answer_data.get("error"):
+            answer_cache.store(document_id, emotion, question, answer_data, question_embedding, generation)
+
+    # Queued for the history; written in the background in batches
+    if not answer_data.get("error"):
+        log_qna(email, document_id, question, answer_data.get("answer", ""), emotion,
+                _module_number(), cache_tier)
 
     return jsonify({
         "answer": answer_data.get("answer", ""),
@@ -79,27 +116,76 @@ def handle_question():
         "emotion": emotion,
         "mode": "rag",
         "document_id": document_id,
+        "cache": cache_tier,
         # "retrieved_chunks": relevant_chunks,  # uncomment if you want to return them
     })
 
-def get_user_qna_history(user_email: str):
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def handle_question_stream():
     """
-    Retrieves all Q&A history for a given user from Firestore.
+    Server-sent-events variant of handle_question: `token` events carry answer text as
+    Gemini generates it, and a final `done` event carries supporting_texts plus
+    time-to-first-token and total latency.
     """
-    from app.config.firebase import db # Import db here to avoid circular dependency if qa_service is imported by other services that also import db
-
-    qna_history = []
-    # Assuming Q&A history is stored under a 'qna_history' collection
-    # and each document within it has an 'email' field
-    docs = db.collection("qna_history").where("email", "==", user_email).stream()
-
-    for doc in docs:
-        qna_data = doc.to_dict()
-        qna_history.append({
-            "question": qna_data.get("question"),
-            "answer": qna_data.get("answer"),
-            "documentId": qna_data.get("document_id"),
-            "moduleNumber": qna_data.get("module_number"), # Assuming module_number is stored
-            "timestamp": qna_data.get("timestamp").isoformat() if qna_data.get("timestamp") else None
+    started = time.perf_counter()
+    params, error = _read_question_request()
+    if error:
+        return error
+    question, document_id, emotion, email = params
+    module_number = _module_number()  # read now: the request context is gone while streaming
+
+    question_embedding = embed_texts([question])[0]
+    generation = get_index_generation(document_id)
+    cached, cache_tier = answer_cache.lookup(document_id, emotion, question, question_embedding, generation)
+
+    relevant_chunks = []
+    if cached is None:
+        relevant_chunks = retrieve_relevant_chunks(question, document_id, top_k=5, query_embedding=question_embedding)
+        if not relevant_chunks:
+            return jsonify({"error": "No relevant content found"}), 404
+
+    def elapsed_ms():
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    def events():
+        first_token_ms = None
+
+        if cached is not None:
+            answer_data = cached
+            first_token_ms = elapsed_ms()
+            yield _sse("token", {"text": answer_data.get("answer", "")})
+        else:
+            combined_context = "\n\n".join([c["chunk"] for c in relevant_chunks])
+            answer_data = None
+            for kind, payload in stream_answer(question, combined_context, emotion):
+                if kind == "token":
+                    if first_token_ms is None:
+                        first_token_ms = elapsed_ms()
+                    yield _sse("token", {"text": payload})
+                elif kind == "done":
+                    answer_data = payload
+                    answer_cache.store(document_id, emotion, question, answer_data, question_embedding, generation)
+                else:
+                    yield _sse("error", {"error": payload, "total_ms": elapsed_ms()})
+                    return
+
+        log_qna(email, document_id, question, answer_data.get("answer", ""), emotion, module_number, cache_tier)
+        total_ms = elapsed_ms()
+        print(f"[QA STREAM] document {document_id} | ttft {first_token_ms} ms | total {total_ms} ms | cache {cache_tier}")
+        yield _sse("done", {
+            "answer": answer_data.get("answer", ""),
+            "supporting_texts": answer_data.get("supporting_texts", []),
+            "emotion": emotion,
+            "mode": "rag",
+            "document_id": document_id,
+            "cache": cache_tier,
+            "timings": {"ttft_ms": first_token_ms, "total_ms": total_ms},
         })
-    return qna_history
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
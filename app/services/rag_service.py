@@ -21,23 +21,36 @@
 
 #     return [{"text": doc, "module": meta["module"]} for doc, meta in zip(docs, metadatas)]
 # rag_retriever.py
-import chromadb
-from chromadb.config import Settings
-from chromadb import PersistentClient
-from chromadb.utils import embedding_functions
+from app.config.model_registry import get_collection
+from app.helpers.chroma_helper import embed_texts
+
+def get_index_generation(document_id):
+    """
+    When the document was last (re)indexed: the indexed_at every indexing run writes on its
+    chunks, read from chunk 0 (always rewritten). Chroma is shared by every process, so this
+    is how the per-process answer cache notices a re-index done elsewhere. None if unknown.
+    """
+    try:
+        result = get_collection().get(ids=[f"{document_id}_0"], include=["metadatas"])
+    except Exception as e:
+        print("[RAG] Reading the index generation failed:", e)
+        return None
+    metadatas = result.get("metadatas") or []
+    return metadatas[0].get("indexed_at") if metadatas else None
 
-client = PersistentClient(path="chroma_storage")
-embedder = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
-collection = client.get_or_create_collection("llm_tutor_docs", embedding_function=embedder)
 
-def retrieve_relevant_chunks(query, document_id, top_k=5):
+def retrieve_relevant_chunks(query, document_id, top_k=5, query_embedding=None):
     """
     Retrieve top_k most semantically relevant chunks from ChromaDB for a given query.
     Always returns top_k regardless of score.
+    Pass `query_embedding` when the caller already embedded the query.
     """
     try:
-        results = collection.query(
-            query_texts=[query],
+        # Query embedding goes through the embedding cache (repeat questions skip the model)
+        if query_embedding is None:
+            query_embedding = embed_texts([query])[0]
+        results = get_collection().query(
+            query_embeddings=[query_embedding],
             n_results=top_k,
             where={"document_id": document_id}
         )
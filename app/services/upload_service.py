@@ -1,51 +1,68 @@
+import io
+import os
+import time
 import uuid
 import datetime
 from flask import current_app
 from app.config.firebase import db
-from app.helpers.storage_helper import upload_file_to_storage
-from app.helpers.upload_helpers import (
-    is_resume_parsable,
-    extract_text_from_pdf,
-    extract_text_from_docx
-)
+from app.helpers import read_cache
+from app.helpers.storage_helper import upload_bytes_to_storage, copy_in_storage
+from app.helpers.text_blob_store import store_extracted_text
+from app.helpers.upload_helpers import extract_text, is_text_parsable
 from app.utils.jwt_handler import verify_token
-from app.helpers.document_parser import download_and_read_file, chunk_text
-
+from app.helpers.document_parser import (
+    download_and_read_file,
+    chunk_text,
+    iter_document_text,
+    iter_chunks,
+    has_enough_text
+)
 
-# ChromaDB setup (Singleton client + consistent embedding function)
-import chromadb
-from chromadb.config import Settings
-from chromadb import PersistentClient
-from chromadb.utils import embedding_functions
+# ChromaDB client, collection and embedder are shared through the model registry
+from app.config.model_registry import get_collection
+from app.helpers.chroma_helper import embed_texts, upsert_chunks, upsert_chunk_stream
+from app.services.answer_cache import invalidate_document
+from app.services.document_catalog import catalog_collection, catalog_entry
+from app.services.dedup_service import (
+    content_hash,
+    find_indexed_content,
+    register_indexed_content,
+    load_duplicate_text,
+    clone_document_chunks
+)
 
-client = PersistentClient(path="chroma_storage")
-chroma_embedder  = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
-collection = client.get_or_create_collection("llm_tutor_docs", embedding_function=chroma_embedder)
+# Uploads at least this large are never held as one string: pages are streamed
+# from the in-memory bytes straight into the incremental chunker. Streamed uploads store
+# no extracted text, which only the dedup path reads (and duplicates of a streamed upload
+# clone its chunks instead), so the bound sits at book size rather than far above it.
+STREAMING_EXTRACTION_MIN_BYTES = int(os.environ.get("STREAMING_EXTRACTION_MIN_BYTES", str(5 * 1024 * 1024)))
 
 # In-memory notes store
 
 
-def upload_document_to_firestore_storage(token: str, file, document_name: str):
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def validate_upload(token: str, file, document_name: str):
     """
-    Verify token, validate & parse the file, upload to Cloud Storage,
-    extract its text, index it, and record metadata in Firestore.
+    Cheap request checks shared by the synchronous and background upload paths.
 
-    Returns: (payload: dict, http_status: int)
+    Returns: (email, None) when the upload may proceed, else (None, (payload, http_status))
     """
     # 1️ Auth
     decoded = verify_token(token)
     email = decoded.get("email")
     if not email:
-        return {"status": "failure", "message": "Invalid token"}, 401
+        return None, ({"status": "failure", "message": "Invalid token"}, 401)
 
     # 2️ File presence & name
     if file is None or not getattr(file, "filename", ""):
-        return {"status": "failure", "message": "No file provided"}, 400
+        return None, ({"status": "failure", "message": "No file provided"}, 400)
 
-    filename = file.filename
-    ext = filename.lower().rsplit(".", 1)[-1]
+    ext = file.filename.lower().rsplit(".", 1)[-1]
     if ext not in ("pdf", "docx"):
-        return {"status": "failure", "message": "Only PDF or DOCX allowed"}, 400
+        return None, ({"status": "failure", "message": "Only PDF or DOCX allowed"}, 400)
 
     # 3️ Check name‐collision
     user_docs_col = db \
@@ -54,129 +71,349 @@ def upload_document_to_firestore_storage(token: str, file, document_name: str):
         .collection(document_name)
     existing = list(user_docs_col.limit(1).stream())
     if existing:
-        return {
+        return None, ({
             "status":  "failure",
             "message": f"Document name '{document_name}' already exists"
-        }, 409
+        }, 409)
 
-    # 4️ Parsability
-    file.stream.seek(0)
-    if not is_resume_parsable(file.stream, filename):
-        return {"status": "failure", "message": "Document is not parsable"}, 422
+    return email, None
 
-    # 5️ Extract text
-    file.stream.seek(0)
-    if ext == "pdf":
-        extracted_text = extract_text_from_pdf(file.stream)
-    else:
-        extracted_text = extract_text_from_docx(file.stream)
 
-    # 5. Upload binary to GCS
-    file.stream.seek(0)
-    doc_id = str(uuid.uuid4())
+def use_streaming_extraction(file_bytes: bytes) -> bool:
+    return len(file_bytes) >= STREAMING_EXTRACTION_MIN_BYTES
+
+
+def parse_document(file_bytes: bytes, filename: str, duplicate: dict = None):
+    """
+    Extract text once from the in-memory upload.
+
+    Returns: (parsable: bool, extracted_text) — extracted_text is None in streaming
+    mode, where only enough pages are read to validate the document.
+    Duplicates of an already-indexed upload reuse its text instead of parsing.
+    """
+    if duplicate:
+        return True, load_duplicate_text(duplicate)
+
+    if use_streaming_extraction(file_bytes):
+        return has_enough_text(iter_document_text(file_bytes, filename)), None
+
+    extracted_text = extract_text(io.BytesIO(file_bytes), filename)
+    return is_text_parsable(extracted_text), extracted_text
+
+
+def store_document(email, document_name, doc_id, filename, content_type, file_bytes, extracted_text,
+                   digest=None, duplicate=None):
+    """
+    Upload the binary to Cloud Storage and write its metadata to Firestore.
+    Duplicates get a server-side copy of the already-stored object in this user's folder:
+    the first uploader's path (their email and document name) is never handed out.
+    Returns: (public_url, storage_path)
+    """
     # include doc_id in storage path so files won’t collide
     storage_folder = f"documents/{email}/{document_name}/{doc_id}"
-    public_url, storage_path = upload_file_to_storage(
-        file,
-        filename,
-        folder=storage_folder
-    )
+    public_url = None
+    if duplicate:
+        try:
+            public_url, storage_path = copy_in_storage(duplicate["storagePath"], filename, storage_folder)
+        except Exception as e:
+            # e.g. the original was deleted: upload this copy's bytes instead
+            print(f"[DEDUP] Copying {duplicate['documentId']} failed, uploading instead: {e}")
+    if public_url is None:
+        public_url, storage_path = upload_bytes_to_storage(
+            file_bytes,
+            filename,
+            folder=storage_folder,
+            content_type=content_type
+        )
 
-    # 6. Write metadata to Firestore
-    doc_ref = db.document(storage_folder)
-    doc_ref.set({
+    metadata = {
         "email":         email,
         "documentName":  document_name,
         "documentId":    doc_id,
         "filename":      filename,
         "url":           public_url,
         "storagePath":   storage_path,
-        "extractedText": extracted_text,
+        "contentHash":   digest,
         "uploadedAt":    datetime.datetime.utcnow()
-    })
+    }
+    if duplicate:
+        metadata["duplicateOf"] = duplicate["documentId"]
+    if extracted_text is None:
+        # Streaming extraction never materializes the full text
+        metadata["streamingExtraction"] = True
+    else:
+        # Only a pointer in Firestore: the text itself goes to Cloud Storage, compressed
+        metadata["extractedTextBlob"] = store_extracted_text(storage_folder, extracted_text)
 
-    # 7. Index into ChromaDB
-    try:
-        chunks_data = index_document(doc_id, public_url, document_name, email)
-        num_chunks = len(chunks_data)
-        print(f" Indexed {num_chunks} chunks for document ID: {doc_id}")
+    # Metadata and the user's listing entry (document_catalog) in one commit
+    batch = db.batch()
+    batch.set(db.document(storage_folder), metadata)
+    batch.set(catalog_collection(email).document(doc_id), catalog_entry(metadata))
+    batch.commit()
+    return public_url, storage_path
+
+
+def mark_document_indexed(email, document_name, doc_id, chunk_count, digest=None, url=None, storage_path=None):
+    """
+    Record on the Firestore metadata that the document is searchable, and register
+    its content hash so later identical uploads can reuse this copy.
+    """
+    db.document(f"documents/{email}/{document_name}/{doc_id}").set({
+        "indexed":    True,
+        "chunkCount": chunk_count,
+        "indexedAt":  datetime.datetime.utcnow()
+    }, merge=True)
+
+    if digest and chunk_count:
+        register_indexed_content(digest, email, document_name, doc_id, url, storage_path, chunk_count)
+
+
+def upload_document_to_firestore_storage(token: str, file, document_name: str):
+    """
+    Verify token, validate & parse the file, upload to Cloud Storage,
+    extract its text, index it, and record metadata in Firestore.
+
+    The upload is read into memory and parsed exactly once; the same text is used
+    for validation, the Firestore metadata and chunking/indexing.
+
+    Returns: (payload: dict, http_status: int)
+    """
+    request_started = time.perf_counter()
+    timings = {}
 
-        # Save module data to Firestore for audio service
-        modules_data = []
-        for idx, chunk_content in enumerate(chunks_data):
-            modules_data.append({
-                "module_number": idx,
-                "module_content": chunk_content,
-                "preview": chunk_content[:100] + "..." if len(chunk_content) > 100 else chunk_content,
-                "length": len(chunk_content)
-            })
-        
-        db.collection("Indexes").document(email).collection(document_id).document("modules").set({
-            "modules": modules_data
-        })
+    # 1-3. Auth, file type and name collision
+    email, error = validate_upload(token, file, document_name)
+    if error:
+        return error
+    filename = file.filename
+
+    # 4️ Extract text once from the in-memory upload, then validate it
+    started = time.perf_counter()
+    file.stream.seek(0)
+    file_bytes = file.stream.read()
+    digest = content_hash(file_bytes)
+    duplicate = find_indexed_content(digest)
+    parsable, extracted_text = parse_document(file_bytes, filename, duplicate)
+    timings["parse_ms"] = _elapsed_ms(started)
 
+    if not parsable:
+        return {"status": "failure", "message": "Document is not parsable"}, 422
+
+    # 5-6. Upload binary to GCS and write metadata to Firestore
+    started = time.perf_counter()
+    doc_id = str(uuid.uuid4())
+    public_url, storage_path = store_document(
+        email, document_name, doc_id, filename, file.content_type, file_bytes, extracted_text,
+        digest=digest, duplicate=duplicate
+    )
+    timings["store_ms"] = _elapsed_ms(started)
+
+    # 7. Index into ChromaDB (reuses the extracted text, no re-download)
+    started = time.perf_counter()
+    try:
+        num_chunks = index_upload(doc_id, public_url, document_name, email, extracted_text, file_bytes, filename,
+                                  digest=digest, duplicate=duplicate)
+        mark_document_indexed(email, document_name, doc_id, num_chunks, digest, public_url, storage_path)
+        print(f" Indexed {num_chunks} chunks for document ID: {doc_id}")
     except Exception as e:
         print("Error during indexing:", str(e))
+    timings["index_ms"] = _elapsed_ms(started)
+    timings["total_ms"] = _elapsed_ms(request_started)
 
     return {
         "status":      "success",
         "message":     "Document uploaded and indexed successfully",
         "documentUrl": public_url,
-        "documentId":  doc_id
+        "documentId":  doc_id,
+        "deduplicated": bool(duplicate),
+        # False for streamed uploads: their full text is never stored
+        "extractedTextStored": extracted_text is not None,
+        "timings":     timings
     }, 201
 
 
-def index_document(document_id: str, document_url: str, document_name: str, user_email: str):
+def queue_document_upload(token: str, file, document_name: str):
     """
-    Download document, chunk text, and add to ChromaDB.
+    Validate the request, spool the file and hand it to the background ingestion queue.
+
+    Returns: (payload: dict, http_status: int) — 202 with the job id on success
+    """
+    from app.services.ingest_job_service import (
+        INGEST_MAX_PENDING,
+        count_pending_jobs,
+        enqueue_ingest_job
+    )
+
+    email, error = validate_upload(token, file, document_name)
+    if error:
+        return error
+
+    if count_pending_jobs() >= INGEST_MAX_PENDING:
+        return {"status": "failure", "message": "Too many documents are being processed, try again shortly"}, 503
+
+    file.stream.seek(0)
+    job = enqueue_ingest_job(email, document_name, file.filename, file.content_type, file.stream.read())
+
+    return {
+        "status":     "queued",
+        "message":    "Document accepted for processing",
+        "jobId":      job["jobId"],
+        "documentId": job["documentId"],
+        "statusUrl":  f"/upload/jobs/{job['jobId']}"
+    }, 202
+
+
+def _chunk_metadata(document_id, idx, document_name, user_email, digest=None, indexed_at=None):
+    metadata = {"document_id": document_id, "module": idx, "documentName": document_name, "email": user_email}
+    if digest:
+        metadata["content_hash"] = digest
+    if indexed_at is not None:
+        # The document's index generation (see rag_service.get_index_generation)
+        metadata["indexed_at"] = indexed_at
+    return metadata
+
+
+def index_document(document_id: str, document_url: str, document_name: str, user_email: str, text: str = None,
+                   digest: str = None):
+    """
+    Chunk text and add to ChromaDB. The document is only downloaded
+    and parsed from `document_url` when no already-extracted `text` is given.
     Returns: list of chunk contents
     """
     print(f"Indexing document ID: {document_id}")
-    text = download_and_read_file(document_url)
+    indexed_at = time.time()
+    if text is None:
+        text = download_and_read_file(document_url)
     if not text:
         raise ValueError("No text extracted from document")
 
     chunks = chunk_text(text)
     print(f" {len(chunks)} chunks extracted")
 
-    for idx, chunk in enumerate(chunks):
-        collection.add(
-            documents=[chunk],
-            metadatas=[{"document_id": document_id, "module": idx, "documentName": document_name, "email": user_email}],
-            ids=[f"{document_id}_{idx}"]
-        )
+    # Embed and write in bulk (INDEX_BATCH_SIZE chunks per forward pass / upsert)
+    upsert_chunks(
+        get_collection(),
+        ids=[f"{document_id}_{idx}" for idx in range(len(chunks))],
+        documents=chunks,
+        metadatas=[_chunk_metadata(document_id, idx, document_name, user_email, digest, indexed_at)
+                   for idx in range(len(chunks))]
+    )
     return chunks # Return chunks content for Firestore saving
 
 
+def index_document_stream(document_id: str, document_name: str, user_email: str, file_bytes: bytes, filename: str,
+                          digest: str = None):
+    """
+    Bounded-memory variant of index_document: pages are read from the in-memory
+    upload one at a time, chunked incrementally and upserted batch by batch.
+    Returns: number of chunks indexed
+    """
+    print(f"Indexing document ID: {document_id} (streaming)")
+    indexed_at = time.time()
+    count = upsert_chunk_stream(
+        get_collection(),
+        iter_chunks(iter_document_text(file_bytes, filename, parallel=True)),
+        make_id=lambda idx: f"{document_id}_{idx}",
+        make_metadata=lambda idx: _chunk_metadata(document_id, idx, document_name, user_email, digest, indexed_at)
+    )
+    if not count:
+        raise ValueError("No text extracted from document")
+    print(f" {count} chunks extracted")
+    return count
+
+
+def index_upload(document_id, document_url, document_name, user_email, extracted_text, file_bytes, filename,
+                 digest=None, duplicate=None):
+    """
+    Index an upload: duplicates copy the canonical chunks and embeddings; otherwise index
+    from the extracted text, or by streaming the bytes when no text was materialized.
+    Returns: number of chunks indexed
+    """
+    # Answers and reads cached for the previous version of this document are stale (other
+    # processes notice the new index generation written with the chunks)
+    invalidate_document(document_id)
+    read_cache.invalidate((user_email, document_id))
+
+    if duplicate:
+        count = clone_document_chunks(duplicate["documentId"], document_id, document_name, user_email, digest)
+        if count:
+            print(f" Reused {count} chunks from duplicate document ID: {duplicate['documentId']}")
+            return count
+        # Canonical chunks are gone from Chroma: fall through and index normally
+
+    if extracted_text is None:
+        return index_document_stream(document_id, document_name, user_email, file_bytes, filename, digest)
+    return len(index_document(document_id, document_url, document_name, user_email, text=extracted_text, digest=digest))
+
+
+# Notes of one module: notes/{email}_{document_id}_{module}/items/{noteId} = {text, createdAt, ...},
+# one document per note, so an append is a single write and concurrent appends never overwrite
+# each other. Notes written before that are still an array on the parent doc ("notes") and are
+# listed first; scripts/migrate_notes.py moves them into items.
+LEGACY_NOTE_CURSOR = "legacy:"
+
+
+def _notes_ref(document_id, module, user_email):
+    return db.collection("notes").document(f"{user_email}_{document_id}_{module}")
+
+
 def add_note(document_id, module, note_text, user_email):
-    doc_ref = db.collection("notes").document(f"{user_email}_{document_id}_{module}")
-    doc = doc_ref.get()
-    if doc.exists:
-        notes = doc.to_dict().get("notes", [])
-    else:
-        notes = []
-    notes.append(note_text)
-    doc_ref.set({
-        "notes": notes,
+    # One write, no read-modify-write of a shared array
+    _notes_ref(document_id, module, user_email).collection("items").add({
+        "text": note_text,
         "email": user_email,
         "documentId": document_id,
-        "module": module
+        "module": module,
+        "createdAt": datetime.datetime.utcnow()
     })
     return {"status": "success", "message": "Note added"}
 
-def get_notes(document_id, module, user_email):
-    doc_ref = db.collection("notes").document(f"{user_email}_{document_id}_{module}")
-    doc = doc_ref.get()
-    if doc.exists:
-        return doc.to_dict().get("notes", [])
-    return []
+def get_notes(document_id, module, user_email, limit=None, cursor=None):
+    """
+    Notes of a module, oldest first: {"notes": [...]} and, with `limit`, one page plus
+    "nextCursor" to pass back as `cursor`. None for an unknown cursor.
+    Not cached: a page is one small query, and a per-process cache would hide notes added
+    through other workers.
+    """
+    notes_ref = _notes_ref(document_id, module, user_email)
+    notes = []
+
+    # Legacy array notes come first; they are only read while the cursor is still inside them
+    if cursor is None or cursor.startswith(LEGACY_NOTE_CURSOR):
+        position = cursor[len(LEGACY_NOTE_CURSOR):] if cursor else "-1"
+        if not position.lstrip("-").isdigit():
+            return None
+        skip = int(position) + 1
+        doc = notes_ref.get()
+        legacy = doc.to_dict().get("notes", []) if doc.exists else []
+        notes = [(f"{LEGACY_NOTE_CURSOR}{i}", text) for i, text in enumerate(legacy)][skip:]
+        if limit is not None and len(notes) >= limit:
+            notes = notes[:limit]
+            return {"notes": [text for _, text in notes], "nextCursor": notes[-1][0]}
+        cursor = None
+
+    query = notes_ref.collection("items").order_by("createdAt")
+    if cursor:
+        last = notes_ref.collection("items").document(cursor).get()
+        if not last.exists:
+            return None
+        query = query.start_after(last)
+    if limit is not None:
+        query = query.limit(limit - len(notes))
+    notes.extend((snapshot.id, snapshot.get("text")) for snapshot in query.stream())
+
+    page = {"notes": [text for _, text in notes]}
+    if limit is not None:
+        page["nextCursor"] = notes[-1][0] if len(notes) == limit else None
+    return page
+
 
 def search_documents_by_query(query: str, user_email: str):
     """
     Searches ChromaDB for documents matching the query and user email.
     """
-    results = collection.query(
-        query_texts=[query],
+    results = get_collection().query(
+        query_embeddings=embed_texts([query]),
         n_results=10,  # Limit to 10 results for now
         where={"email": user_email}
     )
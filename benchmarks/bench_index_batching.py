@@ -0,0 +1,60 @@
+"""
+Chunks/sec for embedding + writing chunks to Chroma at several batch sizes (CPU).
+
+    python -m benchmarks.bench_index_batching --chunks 300 --batch-sizes 1 8 32 64 128
+
+Uses the shared all-MiniLM-L6-v2 embedder and an in-memory Chroma client, so no
+Firestore/Storage credentials are needed.
+"""
+import argparse
+import random
+import time
+import uuid
+
+from app.helpers.chroma_helper import upsert_chunks
+
+WORDS = (
+    "neural network gradient descent layer activation function loss optimizer "
+    "backpropagation weight bias tensor matrix vector learning rate epoch batch "
+    "regularization dropout convolution attention transformer embedding token"
+).split()
+
+
+def make_chunks(count, length=500, seed=0):
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(count):
+        words = []
+        while sum(len(w) + 1 for w in words) < length:
+            words.append(rng.choice(WORDS))
+        chunks.append(" ".join(words)[:length])
+    return chunks
+
+
+def run(chunk_count, batch_sizes):
+    import chromadb
+
+    client = chromadb.EphemeralClient()
+    chunks = make_chunks(chunk_count)
+
+    # Load the model once so the first measurement doesn't include it
+    upsert_chunks(client.get_or_create_collection("warmup"), ["w"], ["warm up"], [{"module": 0}])
+
+    print(f"{'batch':>6} | {'seconds':>8} | {'chunks/sec':>10}")
+    for batch_size in batch_sizes:
+        collection = client.get_or_create_collection(f"bench_{uuid.uuid4().hex[:8]}")
+        ids = [f"doc_{i}" for i in range(len(chunks))]
+        metadatas = [{"document_id": "doc", "module": i} for i in range(len(chunks))]
+
+        started = time.perf_counter()
+        upsert_chunks(collection, ids, chunks, metadatas, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        print(f"{batch_size:>6} | {elapsed:>8.2f} | {len(chunks) / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=300)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64, 128])
+    args = parser.parse_args()
+    run(args.chunks, args.batch_sizes)
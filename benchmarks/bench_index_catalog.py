@@ -0,0 +1,83 @@
+"""
+/index/get-index/all read paths against the in-memory Firestore stand-in, with a fixed
+latency per round trip:
+
+  legacy   - list the document subcollections, then one .get() per document (previous behaviour)
+  rebuild  - first get_catalog call: list, then batched get_all of every summary (fills the catalog)
+  catalog  - one query over indexCatalog/{email}/documents
+
+    python -m benchmarks.bench_index_catalog --documents 10 100 --rpc-ms 20
+
+All three paths must list the same modules; the script asserts it.
+"""
+import argparse
+import time
+
+from tests.firestore_standin import install
+
+db = install()
+
+from app.services import module_store  # noqa: E402  (needs the stand-in installed first)
+
+
+def seed(email, documents, modules_per_document):
+    db.rpc_latency = 0
+    for d in range(documents):
+        modules = [
+            {"module_number": n, "module_name": f"Module {d}.{n}", "module_content": "x" * 2000,
+             "preview": "x" * 100, "length": 2000, "cleaned_leangth": 2000, "similarity": 90.0, "confidence": 90.0}
+            for n in range(1, modules_per_document + 1)
+        ]
+        module_store.save_modules(email, f"doc{d:04d}", modules)
+        module_store.save_summary(email, f"doc{d:04d}", modules)
+
+
+def legacy_listing(email):
+    """The previous get_all_indexes: one summary read per document, one after the other."""
+    catalog = {}
+    for subcollection in db.collection("Indexes").document(email).collections():
+        snapshot = subcollection.document("summary").get()
+        if snapshot.exists:
+            catalog[subcollection.id] = [
+                {"module_number": m["module_number"], "module_name": m["module_name"]}
+                for m in snapshot.to_dict()["modules"]
+            ]
+    return catalog
+
+
+def timed(fn, email, rpc_latency):
+    db.reset_counters()
+    db.rpc_latency = rpc_latency
+    started = time.perf_counter()
+    result = fn(email)
+    elapsed = time.perf_counter() - started
+    rpcs = db.rpcs
+    db.rpc_latency = 0
+    return result, elapsed, rpcs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--modules", type=int, default=8, help="modules per document")
+    parser.add_argument("--rpc-ms", type=float, default=20.0, help="simulated latency per round trip")
+    args = parser.parse_args()
+
+    rpc_latency = args.rpc_ms / 1000
+    print(f"{'documents':>9} | {'path':>8} | {'round trips':>11} | {'ms':>8}")
+    for documents in args.documents:
+        email = f"bench{documents}@example.com"
+        seed(email, documents, args.modules)
+
+        results = []
+        # Forget the catalog written while seeding, so the rebuild starts from scratch
+        db.collection("indexCatalog").document(email).delete()
+        for name, fn in (("legacy", legacy_listing), ("rebuild", module_store.get_catalog), ("catalog", module_store.get_catalog)):
+            catalog, elapsed, rpcs = timed(fn, email, rpc_latency)
+            results.append(catalog)
+            print(f"{documents:>9} | {name:>8} | {rpcs:>11} | {elapsed * 1000:>8.1f}")
+        assert all(result == results[0] for result in results), "every path must list the same modules"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Serial vs process-pool PDF text extraction on synthetic 50-, 500- and 2,000-page PDFs.
+
+    python -m benchmarks.bench_pdf_extraction --pages 50 500 2000 --engine pymupdf
+    python -m benchmarks.bench_pdf_extraction --engine pdfplumber --workers 16
+
+The parallel path is the one used for documents above PARALLEL_EXTRACTION_MIN_PAGES.
+"""
+import argparse
+import io
+import time
+
+from app.helpers.parallel_extraction import PARALLEL_EXTRACTION_WORKERS, extract_pages_parallel
+
+LINE = "Backpropagation computes the gradient of the loss with respect to each weight by the chain rule."
+
+
+def make_pdf(page_count, lines_per_page=40):
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for number in range(page_count):
+        page = doc.new_page()
+        text = "\n".join(f"{number}.{i} {LINE}" for i in range(lines_per_page))
+        page.insert_text((36, 36), text, fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def extract_serial(data, engine):
+    if engine == "pymupdf":
+        import fitz
+
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            return [page.get_text() for page in doc]
+
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [page.extract_text() or '' for page in pdf.pages]
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def run(page_counts, engine, workers):
+    print(f"engine={engine} workers={workers}")
+    print(f"{'pages':>6} | {'serial s':>9} | {'parallel s':>10} | {'speed-up':>8}")
+    for page_count in page_counts:
+        data = make_pdf(page_count)
+        serial, serial_s = timed(extract_serial, data, engine)
+        parallel, parallel_s = timed(extract_pages_parallel, data, page_count, engine=engine, workers=workers)
+        assert parallel == serial, "parallel extraction must return the same pages in the same order"
+        print(f"{page_count:>6} | {serial_s:>9.2f} | {parallel_s:>10.2f} | {serial_s / parallel_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--engine", choices=["pymupdf", "pdfplumber"], default="pymupdf")
+    parser.add_argument("--workers", type=int, default=PARALLEL_EXTRACTION_WORKERS)
+    args = parser.parse_args()
+    run(args.pages, args.engine, args.workers)
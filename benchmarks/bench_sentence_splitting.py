@@ -0,0 +1,79 @@
+"""
+Sentence-splitting throughput (chars/sec) for the text cleaner: the full spaCy pipeline
+one module at a time (previous behaviour) vs the SPACY_SENTENCE_MODE pipelines through nlp.pipe.
+
+    python -m benchmarks.bench_sentence_splitting --modules 200 --module-chars 4000
+    python -m benchmarks.bench_sentence_splitting --modes senter sentencizer --n-process 4
+
+Sentence counts are printed next to the full pipeline's so boundary drift is visible.
+Modes whose model is not installed are skipped.
+"""
+import argparse
+import random
+import time
+
+from app.config.model_registry import get_sentence_nlp
+
+SENTENCES = [
+    "Gradient descent updates each weight in the direction that reduces the loss.",
+    "The learning rate controls how large each of those update steps is, e.g. 0.01 or 0.001.",
+    "Backpropagation applies the chain rule layer by layer to compute gradients.",
+    "Dr. Hinton's 1986 paper popularised it; see Fig. 3 for the network used.",
+    "Regularization such as dropout discourages the network from memorizing the data.",
+    "Exercise: derive the gradient of the mean squared error for a single neuron.",
+]
+
+
+def make_modules(count, length, seed=0):
+    rng = random.Random(seed)
+    modules = []
+    for _ in range(count):
+        parts = []
+        while sum(len(p) + 1 for p in parts) < length:
+            parts.append(rng.choice(SENTENCES))
+        modules.append(" ".join(parts)[:length])
+    return modules
+
+
+def run(nlp, modules, use_pipe, batch_size, n_process):
+    started = time.perf_counter()
+    if use_pipe:
+        docs = nlp.pipe(modules, batch_size=batch_size, n_process=n_process)
+    else:
+        docs = (nlp(module) for module in modules)
+    sentences = sum(len(list(doc.sents)) for doc in docs)
+    return sentences, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--module-chars", type=int, default=4000)
+    parser.add_argument("--modes", nargs="+", default=["full", "senter", "sentencizer"])
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args()
+
+    modules = make_modules(args.modules, args.module_chars)
+    total_chars = sum(len(module) for module in modules)
+    print(f"{args.modules} modules, {total_chars:,} chars, batch_size={args.batch_size}, n_process={args.n_process}")
+    print(f"{'pipeline':<34} | {'chars/sec':>12} | {'sentences':>9} | {'speed-up':>8}")
+
+    cases = [("full", False)] + [(mode, True) for mode in args.modes]
+    baseline = None
+    for mode, use_pipe in cases:
+        try:
+            nlp = get_sentence_nlp(mode)
+        except (OSError, ValueError) as e:
+            print(f"{mode:<34} | skipped: {e}")
+            continue
+
+        sentences, elapsed = run(nlp, modules, use_pipe, args.batch_size, args.n_process)
+        rate = total_chars / elapsed
+        baseline = baseline or rate
+        label = f"{mode}, " + ("nlp.pipe" if use_pipe else "nlp(text) per module")
+        print(f"{label:<34} | {rate:>12,.0f} | {sentences:>9} | {rate / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Similarity/confidence scoring for a document's modules: one TfidfVectorizer fit per
+(original, cleaned) pair (previous behaviour) vs the single vectorized batch pass.
+
+    python -m benchmarks.bench_similarity_scoring --modules 10 100 1000
+
+Both paths must return identical percentages; the script asserts it.
+"""
+import argparse
+import random
+import time
+
+from app.helpers.similarity_calculation import get_similarity_and_confidence_batch
+
+WORDS = (
+    "neural network gradient descent layer activation function loss optimizer "
+    "backpropagation weight bias tensor matrix vector learning rate epoch batch "
+    "regularization dropout convolution attention transformer embedding token "
+    "page contents figure table references chapter index appendix"
+).split()
+
+
+def make_pairs(count, length=500, seed=0):
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(length // 7)]
+        original = " ".join(words)
+        # Cleaning drops a random share of the words
+        keep = rng.uniform(0.3, 1.0)
+        cleaned = " ".join(word for word in words if rng.random() < keep)
+        pairs.append((original, cleaned))
+    return pairs
+
+
+def score_per_pair(pairs):
+    """The previous implementation: a fresh TfidfVectorizer for every pair."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    results = []
+    for original_text, cleaned_text in pairs:
+        vectorizer = TfidfVectorizer().fit([original_text, cleaned_text])
+        vectors = vectorizer.transform([original_text, cleaned_text])
+        similarity = cosine_similarity(vectors[0], vectors[1])[0][0]
+        retention_ratio = len(cleaned_text) / len(original_text) if len(original_text) > 0 else 0
+        raw_confidence = min(10.0, max(0.0, similarity * 7 + retention_ratio * 3))
+        results.append((round(similarity * 100, 2), round(raw_confidence * 10, 2)))
+    return results
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    get_similarity_and_confidence_batch(make_pairs(2))  # import scikit-learn outside the timings
+    print(f"{'modules':>7} | {'per pair ms':>11} | {'batch ms':>9} | {'speed-up':>8}")
+    for count in args.modules:
+        pairs = make_pairs(count)
+        expected, per_pair_s = timed(score_per_pair, pairs)
+        actual, batch_s = timed(get_similarity_and_confidence_batch, pairs)
+        assert actual == expected, "batch scoring must match the per-pair TfidfVectorizer results"
+        print(f"{count:>7} | {per_pair_s * 1000:>11.1f} | {batch_s * 1000:>9.1f} | {per_pair_s / batch_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+LLM calls and wall time per module for the usefulness filter in preprocess_uploaded_text,
+one prompt per paragraph (the old behaviour) vs batched prompts with bounded concurrency.
+
+    python -m benchmarks.bench_usefulness_batching --modules 5 --latency 0.3 --batch-size 8 --workers 4
+    python -m benchmarks.bench_usefulness_batching --tiered   # also run the local tiers (loads MiniLM)
+
+Ollama is replaced by an in-process fake that sleeps `--latency` seconds per call and
+counts calls, so only spaCy/ftfy/textstat are needed. The memo goes to a temporary directory.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+
+from app.config.model_registry import get_sentence_nlp
+from app.helpers import content_filter
+from app.helpers import llm_memo
+from app.helpers import text_cleaner
+from app.services import llm_gateway
+
+SENTENCES = [
+    "Gradient descent updates each weight in the direction that reduces the loss.",
+    "The learning rate controls how large each of those update steps is.",
+    "Backpropagation applies the chain rule layer by layer to compute gradients.",
+    "Regularization such as dropout discourages the network from memorizing the data.",
+    "Exercise: derive the gradient of the mean squared error for a single neuron.",
+]
+NOISE = ["Page 12", "Contents", "3.1 ........ 45", "Figure 4", "ISBN 978-0-00-000000-0", "Answer key: 1b 2c 3a"]
+
+
+class FakeOllama:
+    """Stands in for llm_gateway.ollama_chat: sleeps, counts calls, answers like the real prompts ask."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, messages, model="llama3.2:latest", **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        prompt = messages[-1]["content"]
+        if kwargs.get("format") == "json":
+            items = re.split(r"^\[(\d+)\]\n", prompt, flags=re.MULTILINE)[1:]
+            verdicts = [
+                {"index": int(idx), "useful": "no" if self._noisy(text) else "yes"}
+                for idx, text in zip(items[::2], items[1::2])
+            ]
+            return {"message": {"content": json.dumps({"verdicts": verdicts})}}
+        return {"message": {"content": "no" if self._noisy(prompt) else "yes"}}
+
+    @staticmethod
+    def _noisy(text):
+        return sum(marker in text for marker in NOISE) >= 3
+
+
+def make_module(seed, length=8000):
+    """A noisy ~8,000-character module: prose interleaved with page furniture."""
+    rng = random.Random(seed)
+    lines = []
+    while sum(len(line) + 1 for line in lines) < length:
+        if rng.random() < 0.35:
+            lines.append(rng.choice(NOISE))
+        else:
+            lines.append(" ".join(rng.sample(SENTENCES, 2)))
+        lines.append("")
+    return "\n".join(lines)[:length]
+
+
+def run_case(name, modules, fake, batch_size, workers, memo, tiered=False):
+    # Without the local tiers every paragraph goes to the LLM
+    content_filter.CONTENT_FILTER_DROP_BELOW = 0.35 if tiered else 0.0
+    content_filter.CONTENT_FILTER_KEEP_ABOVE = 0.65 if tiered else 1.0
+    text_cleaner.USEFULNESS_BATCH_SIZE = batch_size
+    text_cleaner.USEFULNESS_WORKERS = workers
+    llm_memo.configure(max_entries=200000 if memo else 0)
+
+    fake.calls = 0
+    started = time.perf_counter()
+    kept = [len(text_cleaner.preprocess_uploaded_text(module)) for module in modules]
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28} | {fake.calls / len(modules):>15.1f} | {elapsed / len(modules):>12.2f} | {sum(kept) // len(modules):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per fake LLM call")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tiered", action="store_true", help="add a run with the local feature/centroid tiers")
+    args = parser.parse_args()
+
+    fake = FakeOllama(args.latency)
+    llm_gateway.ollama_chat = fake
+    llm_memo.configure(path=os.path.join(tempfile.mkdtemp(prefix="llm_memo_"), "memo.sqlite3"))
+    modules = [make_module(seed) for seed in range(args.modules)]
+    get_sentence_nlp()  # load spaCy outside the timed runs
+
+    print(f"{args.modules} modules, {args.latency}s per LLM call")
+    print(f"{'mode':<28} | {'LLM calls/module':>15} | {'s per module':>12} | {'kept chars':>10}")
+    run_case("per paragraph, serial", modules, fake, batch_size=1, workers=1, memo=False)
+    run_case(f"batches of {args.batch_size}, serial", modules, fake, args.batch_size, workers=1, memo=False)
+    run_case(f"batches of {args.batch_size}, {args.workers} workers", modules, fake, args.batch_size, args.workers, memo=True)
+    run_case("same modules again (memo)", modules, fake, args.batch_size, args.workers, memo=True)
+    if args.tiered:
+        llm_memo.configure(path=os.path.join(tempfile.mkdtemp(prefix="llm_memo_"), "memo.sqlite3"))
+        content_filter.local_scores(modules[:1])  # embed the centroids outside the timed run
+        run_case("local tiers + batches", modules, fake, args.batch_size, args.workers, memo=True, tiered=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Timing of concurrent note appends against the in-memory Firestore stand-in: many threads
+add notes to the same module at once, with a simulated latency per round trip.
+
+  array  - previous add_note: get() the notes array, append, set() it back (loses updates)
+  items  - add_note: one write per note into the module's items subcollection
+
+    python -m benchmarks.check_note_appends --threads 16 --notes-per-thread 10 --rpc-ms 5
+
+Reads every note back through paginated get_notes and reports how many were lost (the
+assertion that none are lost with items appends lives in tests/test_notes.py).
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.firestore_standin import install
+
+db = install()
+
+from app.services.upload_service import add_note, get_notes  # noqa: E402  (needs the stand-in installed first)
+
+
+def array_append(document_id, module, note_text, user_email):
+    """The previous read-modify-write add_note."""
+    doc_ref = db.collection("notes").document(f"{user_email}_{document_id}_{module}")
+    doc = doc_ref.get()
+    notes = doc.to_dict().get("notes", []) if doc.exists else []
+    notes.append(note_text)
+    doc_ref.set({"notes": notes, "email": user_email, "documentId": document_id, "module": module})
+
+
+def read_all_pages(document_id, module, user_email, page_size):
+    notes, cursor = [], None
+    while True:
+        page = get_notes(document_id, module, user_email, limit=page_size, cursor=cursor)
+        notes.extend(page["notes"])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return notes
+
+
+def run(append, document_id, threads, notes_per_thread):
+    expected = [f"thread {t} note {n}" for t in range(threads) for n in range(notes_per_thread)]
+    db.reset_counters()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda note: append(document_id, 1, note, "check@example.com"), expected))
+    return expected, time.perf_counter() - started, db.rpcs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--notes-per-thread", type=int, default=10)
+    parser.add_argument("--rpc-ms", type=float, default=5.0, help="simulated latency per round trip")
+    parser.add_argument("--page-size", type=int, default=25)
+    args = parser.parse_args()
+
+    db.rpc_latency = args.rpc_ms / 1000
+    print(f"{'path':>6} | {'appended':>8} | {'stored':>6} | {'lost':>4} | {'round trips':>11} | {'ms':>8}")
+    for name, append in (("array", array_append), ("items", add_note)):
+        expected, elapsed, rpcs = run(append, f"doc-{name}", args.threads, args.notes_per_thread)
+        stored = read_all_pages(f"doc-{name}", 1, "check@example.com", args.page_size)
+        lost = len(set(expected) - set(stored))
+        print(f"{name:>6} | {len(expected):>8} | {len(stored):>6} | {lost:>4} | {rpcs:>11} | {elapsed * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
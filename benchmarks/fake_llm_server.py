@@ -0,0 +1,140 @@
+"""
+Local stand-in for Ollama and the Gemini REST API, for exercising the LLM gateway
+(timeouts, retries, circuit breaker, concurrency caps) without real models.
+
+    python -m benchmarks.fake_llm_server --port 8900 --latency 0.5 --failure-rate 0.2
+
+then start the app (or a benchmark) with
+
+    OLLAMA_HOST=http://127.0.0.1:8900 GEMINI_API_ENDPOINT=http://127.0.0.1:8900 GEMINI_API_KEY=fake
+
+Endpoints: Ollama `POST /api/chat`, Gemini `POST /v1beta/models/<model>:generateContent`
+and `:streamGenerateContent`. Failed requests return 503. Counts are at `GET /stats`.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_lock = threading.Lock()
+_stats = {"requests": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+def _count(**deltas):
+    with _lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+        _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    options = None  # argparse namespace, set in main()
+
+    def log_message(self, format, *args):
+        if self.options.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with _lock:
+                self._send_json(200, dict(_stats))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        _count(requests=1, in_flight=1)
+        try:
+            time.sleep(self.options.latency)
+            if random.random() < self.options.failure_rate:
+                _count(failures=1)
+                self._send_json(503, {"error": "fake overload"})
+            elif self.path.startswith("/api/chat"):
+                self._ollama_chat(request)
+            elif ":streamGenerateContent" in self.path:
+                self._gemini_stream()
+            elif ":generateContent" in self.path:
+                self._send_json(200, self._gemini_response(self.options.reply))
+            else:
+                self._send_json(404, {"error": "not found"})
+        finally:
+            _count(in_flight=-1)
+
+    def _ollama_chat(self, request):
+        content = self.options.reply
+        if request.get("format") == "json":
+            # Batched prompts number their items "[0]", "[1]", ... at the start of a line
+            prompt = (request.get("messages") or [{}])[-1].get("content", "")
+            indices = [int(idx) for idx in re.findall(r"^\[(\d+)\]", prompt, flags=re.MULTILINE)]
+            content = json.dumps({
+                "titles": [{"index": idx, "title": self.options.reply} for idx in indices],
+                "verdicts": [{"index": idx, "useful": "yes"} for idx in indices],
+            })
+        self._send_json(200, {
+            "model": request.get("model", "fake"),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+        })
+
+    @staticmethod
+    def _gemini_response(text):
+        return {"candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "finishReason": "STOP",
+            "index": 0,
+        }]}
+
+    def _gemini_stream(self):
+        # The SDK's REST transport reads a streamed JSON array of responses
+        words = self.options.reply.split(" ")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"[")
+        for idx, word in enumerate(words):
+            text = word if idx == len(words) - 1 else word + " "
+            self.wfile.write((("," if idx else "") + json.dumps(self._gemini_response(text))).encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.options.token_delay)
+        self.wfile.write(b"]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before each response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed chunks")
+    parser.add_argument("--reply", default="Intro To Neural Networks",
+                        help="text returned by every completion")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    FakeLLMHandler.options = args
+    server = ThreadingHTTPServer((args.host, args.port), FakeLLMHandler)
+    print(f"Fake LLM server on http://{args.host}:{args.port} "
+          f"(latency {args.latency}s, failure rate {args.failure_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
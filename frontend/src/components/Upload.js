@@ -3,11 +3,33 @@ import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
 import { UploadCloud, FileText, CheckCircle, XCircle } from 'lucide-react'; // Icons for upload, file, success, error
 
+const API_BASE = 'http://localhost:8000';
+const JOB_POLL_INTERVAL_MS = 2000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Uploads are processed in the background: wait until the ingestion job has finished
+const waitForIngestJob = async (statusUrl, headers, onStage) => {
+  for (;;) {
+    const { data: job } = await axios.get(`${API_BASE}${statusUrl}`, { headers });
+    if (job.status === 'succeeded') {
+      return job;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Processing failed');
+    }
+    const doneStages = Object.keys(job.stages || {}).filter((stage) => job.stages[stage]);
+    onStage(doneStages.length ? doneStages[doneStages.length - 1] : job.status);
+    await sleep(JOB_POLL_INTERVAL_MS);
+  }
+};
+
 const Upload = ({ userEmail }) => {
   const [file, setFile] = useState(null);
   const [documentName, setDocumentName] = useState('');
   const [loading, setLoading] = useState(false);
   const [uploadProgress, setUploadProgress] = useState(0);
+  const [processingStage, setProcessingStage] = useState('');
   const [error, setError] = useState('');
   const [success, setSuccess] = useState(false);
   const navigate = useNavigate();
@@ -52,35 +74,45 @@ const Upload = ({ userEmail }) => {
 
     setLoading(true);
     setUploadProgress(0);
+    setProcessingStage('');
     setError('');
     setSuccess(false);
 
+    let uploaded = false;
     try {
       const token = localStorage.getItem('token');
+      const authHeaders = token ? { Authorization: `Bearer ${token}` } : {};
       const headers = {
         'Content-Type': 'multipart/form-data',
+        ...authHeaders,
       };
-      if (token) {
-        headers['Authorization'] = `Bearer ${token}`;
-      }
 
-      const response = await axios.post('http://localhost:8000/upload/upload-doc', formData, {
+      const response = await axios.post(`${API_BASE}/upload/upload-doc`, formData, {
         headers: headers,
         onUploadProgress: (progressEvent) => {
           const percentCompleted = Math.round((progressEvent.loaded * 100) / progressEvent.total);
           setUploadProgress(percentCompleted);
         },
       });
+      uploaded = true;
+      // 202: queued for background processing; the document exists once its job succeeds
+      if (response.status === 202 && response.data.statusUrl) {
+        setProcessingStage('queued');
+        await waitForIngestJob(response.data.statusUrl, authHeaders, setProcessingStage);
+      }
       setSuccess(true);
       setTimeout(() => {
         navigate(`/document/${response.data.documentId}`);
       }, 1500); // Redirect after a short delay to show success
     } catch (err) {
-      setError('Failed to upload document. Please try again.');
+      setError(uploaded
+        ? `Failed to process document: ${err.message}. Please try again.`
+        : 'Failed to upload document. Please try again.');
       console.error(err);
       setSuccess(false);
     } finally {
       setLoading(false);
+      setProcessingStage('');
     }
   };
 
@@ -158,7 +190,7 @@ const Upload = ({ userEmail }) => {
                   <circle className="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" strokeWidth="4"></circle>
                   <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
                 </svg>
-                Uploading ({uploadProgress}%)
+                {processingStage ? `Processing (${processingStage})` : `Uploading (${uploadProgress}%)`}
               </span>
             ) : (
               'Upload and Process'
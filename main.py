@@ -1,14 +1,20 @@
 import os
-import os
+import threading
+import multiprocessing
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 
-from app.routes.auth_routes import auth_bp
-from app.routes.upload_routes import upload_bp
-from app.routes.roadmap_routes import roadmap_bp
-from app.routes.index_routes import index_bp
-from app.routes.audio_routes import audio_bp
-from app.routes.qa_routes import qa_bp
+from app.config.startup import timed_import, warm_up, should_warm_up
+
+# Blueprints only import their heavy dependencies (models, LLM SDKs, AWS) on first use;
+# per-module import times are reported at /metrics/startup
+auth_bp = timed_import("app.routes.auth_routes").auth_bp
+upload_bp = timed_import("app.routes.upload_routes").upload_bp
+roadmap_bp = timed_import("app.routes.roadmap_routes").roadmap_bp
+index_bp = timed_import("app.routes.index_routes").index_bp
+audio_bp = timed_import("app.routes.audio_routes").audio_bp
+qa_bp = timed_import("app.routes.qa_routes").qa_bp
+metrics_bp = timed_import("app.routes.metrics_routes").metrics_bp
 
 
 app = Flask(__name__, static_folder='frontend')
@@ -20,6 +26,38 @@ app.register_blueprint(roadmap_bp, url_prefix="/roadmap")
 app.register_blueprint(index_bp, url_prefix="/index")
 app.register_blueprint(audio_bp, url_prefix="/audio")
 app.register_blueprint(qa_bp, url_prefix="/qa")
+app.register_blueprint(metrics_bp, url_prefix="/metrics")
+
+# Spawned helper processes (e.g. parallel PDF extraction) re-import this module;
+# only the server process should run the start-up side effects below
+is_server_process = multiprocessing.parent_process() is None
+
+# Optional: preload models before serving (set WARM_UP_ON_START=1, e.g. with gunicorn --preload)
+if is_server_process and should_warm_up():
+    warm_up()
+
+# Pick up ingestion jobs left queued/running by a previous process. This runs lazily, on each
+# serving process's first request: never in processes that fork or spawn the workers (gunicorn
+# --preload master, Flask reloader parent), whose threads would not survive into the workers
+INGEST_RESUME_ON_START = os.environ.get("INGEST_RESUME_ON_START", "1").lower() in ("1", "true", "yes")
+_ingest_resumed_pid = None
+_ingest_resume_lock = threading.Lock()
+
+
+@app.before_request
+def resume_ingest_jobs_once():
+    global _ingest_resumed_pid
+    if not INGEST_RESUME_ON_START or _ingest_resumed_pid == os.getpid():
+        return
+    with _ingest_resume_lock:
+        if _ingest_resumed_pid == os.getpid():
+            return
+        _ingest_resumed_pid = os.getpid()
+    from app.services.ingest_job_service import resume_pending_jobs
+    try:
+        resume_pending_jobs()
+    except Exception as e:
+        print("[INGEST] Resuming pending jobs failed:", str(e))
 
 
 @app.route("/", defaults={"path": ""})
@@ -35,4 +73,3 @@ if __name__ == "__main__":
 
 
 # d10046d1-4c92-4131-8ea6-eb7cdae0ecd8
-
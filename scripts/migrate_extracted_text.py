@@ -0,0 +1,66 @@
+"""
+Move inline `extractedText` out of document metadata (documents/{email}/{documentName}/{docId})
+into compressed Cloud Storage objects, leaving the `extractedTextBlob` pointer
+(see app/helpers/text_blob_store.py).
+
+    python -m scripts.migrate_extracted_text --dry-run
+    python -m scripts.migrate_extracted_text --email someone@example.com
+
+Idempotent: metadata without an inline text is skipped.
+"""
+import argparse
+
+from firebase_admin import firestore
+
+from app.config.firebase import db
+from app.helpers.text_blob_store import store_extracted_text
+
+
+def iter_metadata_refs(email=None):
+    """Every documents/{email}/{documentName}/{docId} reference."""
+    # Per-user parents have no fields, so list_documents (which includes missing docs) is needed
+    parents = [db.collection("documents").document(email)] if email else db.collection("documents").list_documents()
+    for parent in parents:
+        for name_collection in parent.collections():
+            for ref in name_collection.list_documents():
+                yield ref
+
+
+def migrate_metadata(ref, dry_run=False):
+    """Returns ("migrated" | "skipped", bytes of inline text)."""
+    snapshot = ref.get()
+    text = snapshot.get("extractedText") if snapshot.exists else None
+    if text is None:
+        return "skipped", 0
+
+    if not dry_run:
+        # ref.path is documents/{email}/{documentName}/{docId}, the upload's storage folder
+        pointer = store_extracted_text(ref.path, text)
+        ref.update({"extractedTextBlob": pointer, "extractedText": firestore.DELETE_FIELD})
+    return "migrated", len(text.encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email", help="only migrate this user's documents")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    counts = {"migrated": 0, "skipped": 0, "failed": 0}
+    moved_bytes = 0
+    for ref in iter_metadata_refs(args.email):
+        try:
+            outcome, size = migrate_metadata(ref, args.dry_run)
+        except Exception as e:
+            outcome, size = "failed", 0
+            print(f"[FAILED] {ref.path}: {e}")
+        counts[outcome] += 1
+        moved_bytes += size
+        if outcome == "migrated":
+            print(f"[{'DRY RUN' if args.dry_run else 'MIGRATED'}] {ref.path} ({size} bytes)")
+
+    print(", ".join(f"{name}: {count}" for name, count in counts.items()) + f", text moved: {moved_bytes} bytes")
+
+
+if __name__ == "__main__":
+    main()
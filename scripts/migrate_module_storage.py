@@ -0,0 +1,73 @@
+"""
+Convert cached module lists from the single-document layout
+(Indexes/{email}/{document_id}/modules) to per-module docs plus a summary (see app/services/module_store.py).
+
+    python -m scripts.migrate_module_storage --dry-run
+    python -m scripts.migrate_module_storage --email someone@example.com
+    python -m scripts.migrate_module_storage --delete-legacy
+
+Idempotent: documents that already have a summary are skipped. The legacy `modules`
+doc is kept unless --delete-legacy is given (readers ignore it once a summary exists).
+"""
+import argparse
+
+from app.config.firebase import db
+from app.services import module_store
+
+
+def iter_indexed_documents(email=None):
+    """(email, document_id) for every Indexes/{email}/{document_id} subcollection."""
+    # Index parents usually have no fields, so list_documents (which includes missing docs) is needed
+    parents = [db.collection("Indexes").document(email)] if email else db.collection("Indexes").list_documents()
+    for parent in parents:
+        for subcollection in parent.collections():
+            yield parent.id, subcollection.id
+
+
+def migrate_document(email, document_id, dry_run=False, delete_legacy=False):
+    """Returns "migrated", "skipped" or "empty"."""
+    index = module_store.index_collection(email, document_id)
+    legacy_ref = index.document("modules")
+
+    if index.document("summary").get().exists:
+        if delete_legacy and not dry_run:
+            legacy_ref.delete()
+        return "skipped"
+
+    legacy = legacy_ref.get()
+    modules = legacy.to_dict().get("modules") if legacy.exists else None
+    if not modules:
+        return "empty"
+
+    if not dry_run:
+        module_store.save_modules(email, document_id, modules)
+        # Summary last, so an interrupted run is simply redone
+        module_store.save_summary(email, document_id, modules)
+        if delete_legacy:
+            legacy_ref.delete()
+    return "migrated"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email", help="only migrate this user's documents")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--delete-legacy", action="store_true", help="delete the old `modules` doc after migrating")
+    args = parser.parse_args()
+
+    counts = {"migrated": 0, "skipped": 0, "empty": 0, "failed": 0}
+    for email, document_id in iter_indexed_documents(args.email):
+        try:
+            outcome = migrate_document(email, document_id, args.dry_run, args.delete_legacy)
+        except Exception as e:
+            outcome = "failed"
+            print(f"[FAILED] {email}/{document_id}: {e}")
+        counts[outcome] += 1
+        if outcome == "migrated":
+            print(f"[{'DRY RUN' if args.dry_run else 'MIGRATED'}] {email}/{document_id}")
+
+    print(", ".join(f"{name}: {count}" for name, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Move note arrays (notes/{email}_{documentId}_{module}.notes) into one document per note
+under notes/{...}/items (see add_note in app/services/upload_service.py).
+
+    python -m scripts.migrate_notes --dry-run
+    python -m scripts.migrate_notes
+
+Idempotent: items get deterministic ids (legacy_00000, ...) and the array is removed in the
+last batch, so an interrupted run is simply redone.
+"""
+import argparse
+import datetime
+
+from firebase_admin import firestore
+
+from app.config.firebase import db
+
+# Firestore caps a write batch at 500 operations (one is kept for removing the array)
+_MAX_BATCH_WRITES = 500
+# Array notes have no timestamps: give them increasing ones that sort before every real note
+_LEGACY_EPOCH = datetime.datetime(2000, 1, 1)
+
+
+def migrate_notes_doc(snapshot, dry_run=False):
+    """Returns the number of notes moved."""
+    data = snapshot.to_dict()
+    notes = data.get("notes")
+    if not notes:
+        return 0
+    if dry_run:
+        return len(notes)
+
+    items = snapshot.reference.collection("items")
+    writes = [
+        (items.document(f"legacy_{i:05d}"), {
+            "text": text,
+            "email": data.get("email"),
+            "documentId": data.get("documentId"),
+            "module": data.get("module"),
+            "createdAt": _LEGACY_EPOCH + datetime.timedelta(milliseconds=i)
+        })
+        for i, text in enumerate(notes)
+    ]
+    for start in range(0, len(writes), _MAX_BATCH_WRITES - 1):
+        batch = db.batch()
+        for ref, item in writes[start:start + _MAX_BATCH_WRITES - 1]:
+            batch.set(ref, item)
+        if start + _MAX_BATCH_WRITES - 1 >= len(writes):
+            batch.update(snapshot.reference, {"notes": firestore.DELETE_FIELD})
+        batch.commit()
+    return len(notes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    counts = {"migrated": 0, "skipped": 0, "failed": 0}
+    moved = 0
+    for snapshot in db.collection("notes").stream():
+        try:
+            count = migrate_notes_doc(snapshot, args.dry_run)
+        except Exception as e:
+            counts["failed"] += 1
+            print(f"[FAILED] notes/{snapshot.id}: {e}")
+            continue
+        counts["migrated" if count else "skipped"] += 1
+        moved += count
+        if count:
+            print(f"[{'DRY RUN' if args.dry_run else 'MIGRATED'}] notes/{snapshot.id}: {count} notes")
+
+    print(", ".join(f"{name}: {count}" for name, count in counts.items()) + f", notes moved: {moved}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import sys
+
+import pytest
+
+from tests.firestore_standin import Client, make_module
+
+
+def _app_modules():
+    return {name: module for name, module in sys.modules.items() if name == "app" or name.startswith("app.")}
+
+
+@pytest.fixture
+def firestore():
+    """
+    A fresh in-memory Firestore (tests/firestore_standin.py) as app.config.firebase.
+    App modules bind `db` when imported, so tests import them inside the test: they are
+    imported anew against the stand-in, and the previously loaded ones are restored after.
+    """
+    saved = _app_modules()
+    for name in saved:
+        del sys.modules[name]
+    client = Client(rpc_latency=0.002)
+    sys.modules["app.config.firebase"] = make_module(client)
+    try:
+        yield client
+    finally:
+        for name in _app_modules():
+            del sys.modules[name]
+        sys.modules.update(saved)
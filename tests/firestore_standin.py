@@ -0,0 +1,270 @@
+"""
+In-memory stand-in for the subset of the Firestore client the app uses, with a fixed
+latency per round trip, for the tests and for benchmarks comparing access patterns without
+a project or emulator. Not a faithful emulator: no transactions, indexes or security rules.
+
+Tests get it through the `firestore` fixture (tests/conftest.py), which puts the real
+module back afterwards. Benchmark scripts install it for the whole process:
+
+    from tests.firestore_standin import install
+    db = install(rpc_latency=0.02)   # before importing anything from app.*
+
+install() registers the stand-in as `app.config.firebase` (db + bucket=None), so every
+`from app.config.firebase import db` picks it up.
+"""
+import copy
+import datetime
+import sys
+import threading
+import time
+import types
+import uuid
+
+_OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+class Snapshot:
+    def __init__(self, reference, data, create_time=None):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.exists = data is not None
+        self.create_time = create_time
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+
+class DocumentReference:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name):
+        return CollectionReference(self._client, f"{self.path}/{name}")
+
+    def get(self, field_paths=None):
+        self._client._rpc()
+        return self._client._snapshot(self, field_paths)
+
+    def set(self, data, merge=False):
+        self._client._rpc()
+        self._client._write(self, data, merge)
+
+    def update(self, data):
+        self._client._rpc()
+        if self.path not in self._client.store:
+            raise KeyError(f"No document to update: {self.path}")
+        self._client._write(self, data, merge=True)
+
+    def create(self, data):
+        self._client._rpc()
+        if self.path in self._client.store:
+            raise ValueError(f"Document already exists: {self.path}")
+        self._client._write(self, data, merge=False)
+
+    def delete(self):
+        self._client._rpc()
+        self._client._delete(self)
+
+    def collections(self):
+        self._client._rpc()
+        prefix = self.path + "/"
+        names = sorted({path[len(prefix):].split("/")[0] for path in self._client.store if path.startswith(prefix)})
+        return [CollectionReference(self._client, prefix + name) for name in names]
+
+
+class Query:
+    def __init__(self, collection, filters=(), order=None, descending=False, limit=None, start_after=None, fields=None):
+        self._collection = collection
+        self._filters = list(filters)
+        self._order = order
+        self._descending = descending
+        self._limit = limit
+        self._start_after = start_after
+        self._fields = fields
+
+    def _with(self, **changes):
+        state = dict(filters=self._filters, order=self._order, descending=self._descending,
+                     limit=self._limit, start_after=self._start_after, fields=self._fields)
+        state.update(changes)
+        return Query(self._collection, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._with(filters=self._filters + [(field_path, op_string, value)])
+
+    def order_by(self, field_path, direction="ASCENDING"):
+        return self._with(order=field_path, descending=direction == "DESCENDING")
+
+    def limit(self, count):
+        return self._with(limit=count)
+
+    def start_after(self, snapshot):
+        return self._with(start_after=snapshot)
+
+    def select(self, field_paths):
+        return self._with(fields=list(field_paths))
+
+    def stream(self):
+        client = self._collection._client
+        client._rpc()  # one round trip, however many documents come back
+        prefix = self._collection.path + "/"
+        docs = [
+            (path, data) for path, data in client.store.items()
+            if path.startswith(prefix) and "/" not in path[len(prefix):]
+        ]
+        docs = [(path, data) for path, data in docs
+                if all(_OPS[op](data.get(field), value) for field, op, value in self._filters)]
+        if self._order:
+            docs = [(path, data) for path, data in docs if self._order in data]
+            docs.sort(key=lambda item: (item[1][self._order], item[0]), reverse=self._descending)
+        else:
+            docs.sort(key=lambda item: item[0])
+        if self._start_after is not None:
+            paths = [path for path, _ in docs]
+            docs = docs[paths.index(self._start_after.reference.path) + 1:]
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        for path, _ in docs:
+            yield client._snapshot(DocumentReference(client, path), self._fields)
+
+    def get(self):
+        return list(self.stream())
+
+
+class CollectionReference(Query):
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+        super().__init__(self)
+
+    def document(self, name=None):
+        return DocumentReference(self._client, f"{self.path}/{name or uuid.uuid4().hex[:20]}")
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+    def list_documents(self):
+        # Includes "missing" parents that only hold subcollections, like the real client
+        self._client._rpc()
+        prefix = self.path + "/"
+        names = sorted({path[len(prefix):].split("/")[0] for path in self._client.store if path.startswith(prefix)})
+        return [DocumentReference(self._client, prefix + name) for name in names]
+
+
+class WriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append(lambda: self._client._write(ref, data, merge))
+
+    def update(self, ref, data):
+        self._ops.append(lambda: self._client._write(ref, data, merge=True))
+
+    def delete(self, ref):
+        self._ops.append(lambda: self._client._delete(ref))
+
+    def commit(self):
+        if len(self._ops) > 500:
+            raise ValueError("A write batch can hold at most 500 operations")
+        self._client._rpc()
+        with self._client._lock:
+            for op in self._ops:
+                op()
+
+
+class Client:
+    """`rpcs` counts round trips, `reads` / `writes` count documents (what Firestore bills)."""
+
+    def __init__(self, rpc_latency=0.0):
+        self.rpc_latency = rpc_latency
+        self.store = {}
+        self.create_times = {}
+        self.rpcs = 0
+        self.reads = 0
+        self.writes = 0
+        self._lock = threading.RLock()
+
+    def _rpc(self):
+        with self._lock:
+            self.rpcs += 1
+        if self.rpc_latency:
+            time.sleep(self.rpc_latency)
+
+    def _snapshot(self, ref, field_paths=None):
+        with self._lock:
+            self.reads += 1
+            data = copy.deepcopy(self.store.get(ref.path))
+            create_time = self.create_times.get(ref.path)
+        if data is not None and field_paths is not None:
+            data = {key: value for key, value in data.items() if key in field_paths}
+        return Snapshot(ref, data, create_time)
+
+    def _write(self, ref, data, merge):
+        with self._lock:
+            self.writes += 1
+            self.create_times.setdefault(ref.path, datetime.datetime.now(datetime.timezone.utc))
+            if merge and ref.path in self.store:
+                self.store[ref.path].update(copy.deepcopy(data))
+            else:
+                self.store[ref.path] = copy.deepcopy(data)
+
+    def _delete(self, ref):
+        with self._lock:
+            self.store.pop(ref.path, None)
+            self.create_times.pop(ref.path, None)
+
+    def reset_counters(self):
+        self.rpcs = self.reads = self.writes = 0
+
+    def collection(self, name):
+        return CollectionReference(self, name)
+
+    def document(self, path):
+        return DocumentReference(self, path)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def get_all(self, refs, field_paths=None):
+        refs = list(refs)
+        if not refs:
+            return
+        self._rpc()  # BatchGetDocuments: a single round trip
+        for ref in refs:
+            yield self._snapshot(ref, field_paths)
+
+
+def make_module(client):
+    """An `app.config.firebase` module backed by `client`."""
+    module = types.ModuleType("app.config.firebase")
+    module.db = client
+    module.bucket = None
+    return module
+
+
+def install(rpc_latency=0.0):
+    """Register a fresh stand-in as app.config.firebase and return its client."""
+    client = Client(rpc_latency)
+    sys.modules["app.config.firebase"] = make_module(client)
+    return client
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+EMAIL = "notes@example.com"
+
+
+@pytest.fixture
+def notes(firestore):
+    from app.services import upload_service
+    return upload_service
+
+
+def read_all_pages(notes, document_id, module, page_size):
+    pages, cursor = [], None
+    while True:
+        page = notes.get_notes(document_id, module, EMAIL, limit=page_size, cursor=cursor)
+        pages.extend(page["notes"])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return pages
+
+
+def test_concurrent_add_note_keeps_every_note(notes):
+    expected = [f"thread {t} note {n}" for t in range(8) for n in range(6)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda note: notes.add_note("doc-concurrent", 1, note, EMAIL), expected))
+
+    stored = read_all_pages(notes, "doc-concurrent", 1, page_size=7)
+    assert sorted(stored) == sorted(expected)
+
+
+def test_notes_page_in_insertion_order_after_legacy_array(notes, firestore):
+    firestore.collection("notes").document(f"{EMAIL}_doc-legacy_2").set({"notes": ["old 0", "old 1", "old 2"]})
+    for n in range(4):
+        notes.add_note("doc-legacy", 2, f"new {n}", EMAIL)
+
+    expected = ["old 0", "old 1", "old 2", "new 0", "new 1", "new 2", "new 3"]
+    assert notes.get_notes("doc-legacy", 2, EMAIL) == {"notes": expected}
+    assert read_all_pages(notes, "doc-legacy", 2, page_size=2) == expected
+
+
+def test_add_note_is_visible_to_the_next_read(notes):
+    notes.add_note("doc-cached", 1, "first", EMAIL)
+    assert notes.get_notes("doc-cached", 1, EMAIL) == {"notes": ["first"]}
+    notes.add_note("doc-cached", 1, "second", EMAIL)
+    assert notes.get_notes("doc-cached", 1, EMAIL) == {"notes": ["first", "second"]}